@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from .config import ConfigManager, GameConfig
 from communication_module.tcp_communication import TcpCommunication
+from communication_module.framing import LineFramer, FrameTooLargeError
 from game_engine_module.game_engine import GameEngine
 
 # Configuration du logger
@@ -109,7 +110,7 @@ class AdminServer:
     
     def _handle_client(self, client_sock, addr):
         """Gérer les communications avec un client administrateur"""
-        buffer = ""
+        framer = LineFramer()
         client_sock.setblocking(False)
         
         try:
@@ -122,19 +123,18 @@ class AdminServer:
                     break
                 
                 if client_sock in readable:
-                    data = client_sock.recv(4096)
-                    if not data:
+                    received = framer.recv_from(client_sock)
+                    if not received:
                         self.logger.info(f"Client déconnecté: {addr}")
                         break
                     
-                    # Ajouter les données au buffer
-                    buffer += data.decode('utf-8')
-                    
                     # Traiter les messages complets dans le buffer
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        if line:
-                            self._process_message(client_sock, addr, line)
+                    for frame in framer.frames():
+                        if frame:
+                            self._process_message(client_sock, addr, frame.decode('utf-8', errors='replace'))
+        except FrameTooLargeError as e:
+            self.logger.warning(f"Message trop long de {addr}: {e}")
+            self._send_error(client_sock, f"Message trop long (maximum {e.max_frame_size} octets)")
         except Exception as e:
             self.logger.error(f"Erreur lors du traitement du client {addr}: {e}")
         finally:
@@ -325,7 +325,8 @@ class AdminServer:
                 config.max_time_per_turn,
                 config.num_turns,
                 config.num_obstacles,
-                config.max_players
+                config.max_players,
+                config.view_radius
             )
             
             self._send_response(client_sock, {
@@ -350,7 +351,8 @@ class AdminServer:
                 config.max_time_per_turn,
                 config.num_turns,
                 config.num_obstacles,
-                config.max_players
+                config.max_players,
+                config.view_radius
             )
             
             self._send_response(client_sock, {
@@ -423,7 +425,7 @@ class AdminServer:
         # Collecter les statistiques
         stats = {
             "server_uptime": self._get_uptime(),
-            "active_games": len(self.game_engine.games),
+            "active_games": self.game_engine.get_game_count(),
             "open_games": len(self.game_engine.get_open_games()),
             "connected_players": self._count_connected_players()
         }
@@ -437,10 +439,8 @@ class AdminServer:
     
     def _count_connected_players(self):
         """Compter le nombre de joueurs connectés"""
-        count = 0
-        for game in self.game_engine.games.values():
-            count += sum(1 for p in game.board.players.values() if p.is_alive)
-        return count
+        # Chaque plateau n'est lu que par l'acteur de sa partie
+        return self.game_engine.count_alive_players()
 
 
 # Point d'entrée pour démarrer le serveur
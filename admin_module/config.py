@@ -25,6 +25,9 @@ class GameConfig:
     max_wolves: Optional[int] = None
     max_villagers: Optional[int] = None
     
+    # Brouillard de guerre : distance de vue des joueurs (None : plateau entier)
+    view_radius: Optional[int] = None
+    
     def __post_init__(self):
         """Calcule automatiquement les quotas de rôles si non définis"""
         if self.max_wolves is None:
@@ -63,6 +66,9 @@ class GameConfig:
         if self.max_villagers <= 0:
             return False, "Il faut au moins 1 villageois"
             
+        if self.view_radius is not None and self.view_radius < 0:
+            return False, "La distance de vue ne peut pas être négative"
+        
         if self.max_wolves + self.max_villagers != self.max_players:
             return False, "Le nombre total de loups et de villageois doit égaler le nombre maximum de joueurs"
             
@@ -134,7 +140,8 @@ class ConfigManager:
                 num_obstacles=int(config_data.get('num_obstacles', 5)),
                 max_players=int(config_data.get('max_players', 8)),
                 max_wolves=int(config_data.get('max_wolves')) if 'max_wolves' in config_data else None,
-                max_villagers=int(config_data.get('max_villagers')) if 'max_villagers' in config_data else None
+                max_villagers=int(config_data.get('max_villagers')) if 'max_villagers' in config_data else None,
+                view_radius=int(config_data['view_radius']) if config_data.get('view_radius') is not None else None
             )
             
             # Valider la configuration
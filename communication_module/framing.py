@@ -0,0 +1,137 @@
+DEFAULT_MAX_FRAME_SIZE = 64 * 1024
+DEFAULT_RECV_SIZE = 4096
+
+class FrameTooLargeError(Exception):
+    """Levée quand une trame dépasse la taille maximale autorisée"""
+    
+    def __init__(self, max_frame_size):
+        super().__init__(f"Trame supérieure à {max_frame_size} octets")
+        self.max_frame_size = max_frame_size
+
+class LineFramer:
+    """
+    Découpage d'un flux d'octets en trames terminées par '\\n'
+    (ou préfixées par leur longueur après use_length_prefix())
+    
+    Les données sont reçues directement dans un bytearray (recv_into sur un
+    memoryview) et le délimiteur est recherché à partir d'un curseur, de
+    sorte que chaque octet n'est parcouru qu'une fois quel que soit le
+    nombre de lignes envoyées d'un coup ou la taille d'une trame.
+    Les trames sont rendues en bytes : le décodage UTF-8 se fait sur une
+    ligne complète et ne peut donc pas couper une séquence multi-octets.
+    """
+    
+    def __init__(self, max_frame_size=DEFAULT_MAX_FRAME_SIZE, recv_size=DEFAULT_RECV_SIZE):
+        self.max_frame_size = max_frame_size  # None : pas de limite
+        self.recv_size = recv_size
+        self.buffer = bytearray(recv_size)
+        self.start = 0  # début des données non consommées
+        self.end = 0    # fin des données reçues
+        self.scan = 0   # position jusqu'à laquelle le délimiteur a déjà été cherché
+        self.length_prefixed = False
+    
+    def use_length_prefix(self, enabled=True):
+        """
+        Basculer entre trames terminées par '\\n' et trames préfixées par
+        leur longueur (uint32 big-endian). Les octets déjà reçus sont conservés
+        """
+        self.length_prefixed = enabled
+        self.scan = self.start
+    
+    def pending(self):
+        """Nombre d'octets reçus mais pas encore consommés"""
+        return self.end - self.start
+    
+    def pending_bytes(self):
+        """Copie des octets reçus mais pas encore consommés (début d'une trame incomplète)"""
+        return bytes(self.buffer[self.start:self.end])
+    
+    def _reserve(self, size):
+        """Garantir au moins size octets libres en fin de buffer"""
+        if len(self.buffer) - self.end >= size:
+            return
+        
+        # Ramener les données non consommées au début du buffer
+        if self.start > 0:
+            pending = self.end - self.start
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+            self.scan -= self.start
+            self.start = 0
+            self.end = pending
+        
+        missing = size - (len(self.buffer) - self.end)
+        if missing > 0:
+            self.buffer.extend(bytes(max(missing, len(self.buffer))))
+    
+    def recv_from(self, sock):
+        """
+        Recevoir des données du socket directement dans le buffer
+        Retourne le nombre d'octets reçus (0 si le pair a fermé la connexion)
+        """
+        self._reserve(self.recv_size)
+        with memoryview(self.buffer) as view:
+            received = sock.recv_into(view[self.end:self.end + self.recv_size])
+        self.end += received
+        return received
+    
+    def feed(self, data):
+        """Ajouter des octets déjà reçus au buffer"""
+        self._reserve(len(data))
+        self.buffer[self.end:self.end + len(data)] = data
+        self.end += len(data)
+    
+    def next_frame(self):
+        """
+        Extraire la prochaine trame complète (sans le '\\n')
+        Retourne None si aucune trame complète n'est disponible
+        Lève FrameTooLargeError si la trame dépasse la taille maximale
+        """
+        if self.length_prefixed:
+            return self._next_prefixed_frame()
+        
+        index = self.buffer.find(b'\n', self.scan, self.end)
+        if index < 0:
+            self.scan = self.end
+            self._check_size(self.end - self.start)
+            return None
+        
+        self._check_size(index - self.start)
+        with memoryview(self.buffer) as view:
+            frame = bytes(view[self.start:index])
+        
+        self.start = self.scan = index + 1
+        if self.start == self.end:
+            self.start = self.end = self.scan = 0
+        return frame
+    
+    def _next_prefixed_frame(self):
+        """Extraire la prochaine trame préfixée par sa longueur"""
+        if self.end - self.start < 4:
+            return None
+        
+        size = int.from_bytes(self.buffer[self.start:self.start + 4], 'big')
+        self._check_size(size)
+        frame_end = self.start + 4 + size
+        if frame_end > self.end:
+            return None
+        
+        with memoryview(self.buffer) as view:
+            frame = bytes(view[self.start + 4:frame_end])
+        
+        self.start = self.scan = frame_end
+        if self.start == self.end:
+            self.start = self.end = self.scan = 0
+        return frame
+    
+    def frames(self):
+        """Itérer sur toutes les trames complètes disponibles"""
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            yield frame
+    
+    def _check_size(self, size):
+        """Vérifier qu'une trame ne dépasse pas la taille maximale"""
+        if self.max_frame_size is not None and size > self.max_frame_size:
+            raise FrameTooLargeError(self.max_frame_size)
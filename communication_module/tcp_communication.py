@@ -11,6 +11,8 @@ from datetime import datetime
 # Ajouter le chemin parent pour pouvoir importer les modules frères
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from communication_module.framing import LineFramer, FrameTooLargeError
+
 class TcpCommunication:
     """Gestion de la communication TCP entre les modules du système"""
     
@@ -69,7 +71,7 @@ class TcpCommunication:
     
     def _handle_client(self, client_sock, addr):
         """Gérer les communications avec un module client"""
-        buffer = ""
+        framer = LineFramer()
         client_sock.setblocking(False)
         
         try:
@@ -82,19 +84,18 @@ class TcpCommunication:
                     break
                 
                 if client_sock in readable:
-                    data = client_sock.recv(4096)
-                    if not data:
+                    received = framer.recv_from(client_sock)
+                    if not received:
                         self.logger.info(f"Client disconnected: {addr}")
                         break
                     
-                    # Ajouter les données au buffer
-                    buffer += data.decode('utf-8')
-                    
                     # Traiter les messages complets dans le buffer
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        if line:
-                            self._process_message(client_sock, addr, line)
+                    for frame in framer.frames():
+                        if frame:
+                            self._process_message(client_sock, addr, frame.decode('utf-8', errors='replace'))
+        except FrameTooLargeError as e:
+            self.logger.warning(f"Message too long from {addr}: {e}")
+            self._send_message(client_sock, {"status": "error", "message": str(e)})
         except Exception as e:
             self.logger.error(f"Error handling client {addr}: {e}")
         finally:
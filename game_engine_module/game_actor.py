@@ -0,0 +1,108 @@
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+class GameExecutor:
+    """
+    Pool of worker threads running game actors
+    A scheduled actor is picked up by one worker at a time, so the tasks of a
+    game run serially while different games run on different workers
+    """
+    
+    def __init__(self, workers):
+        self.run_queue = queue.SimpleQueue()  # actors with pending tasks
+        self.local = threading.local()  # actor being run by the current worker
+        self.threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self._work, name=f"GameWorker-{index}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+    
+    def schedule(self, actor):
+        """Queue an actor whose mailbox is not empty"""
+        self.run_queue.put(actor)
+    
+    def current_actor(self):
+        """Actor running on the current thread, or None"""
+        return getattr(self.local, "actor", None)
+    
+    def _work(self):
+        while True:
+            actor = self.run_queue.get()
+            if actor is None:
+                return
+            actor._run(self.local)
+    
+    def shutdown(self):
+        """Stop the workers once the queued actors are done"""
+        for _ in self.threads:
+            self.run_queue.put(None)
+
+class GameActor:
+    """
+    Mailbox of one game: tasks are run serially, in submission order
+    Only the worker running the actor touches the game's state
+    """
+    
+    # Tasks run before giving the worker back to other games
+    BUDGET = 64
+    
+    def __init__(self, executor, name):
+        self.executor = executor
+        self.name = name
+        self.mailbox = deque()  # (Future, function, args)
+        self.lock = threading.Lock()
+        self.scheduled = False  # queued on the executor or being run
+        self.logger = logging.getLogger(f"GameActor-{name}")
+    
+    def submit(self, function, *args):
+        """Queue a task for the game and return its Future"""
+        future = Future()
+        with self.lock:
+            self.mailbox.append((future, function, args))
+            if self.scheduled:
+                return future
+            self.scheduled = True
+        self.executor.schedule(self)
+        return future
+    
+    def call(self, function, *args):
+        """Run a task on the game and wait for its result (inline when already on this actor)"""
+        if self.executor.current_actor() is self:
+            return function(*args)
+        return self.submit(function, *args).result()
+    
+    def tell(self, function, *args):
+        """Queue a task without waiting for it; errors are logged"""
+        self.submit(function, *args).add_done_callback(self._log_failure)
+    
+    def _log_failure(self, future):
+        error = future.exception()
+        if error is not None:
+            self.logger.error(f"Task failed: {error}")
+    
+    def _run(self, local):
+        """Run queued tasks on the current worker, up to the budget"""
+        local.actor = self
+        try:
+            for _ in range(self.BUDGET):
+                with self.lock:
+                    if not self.mailbox:
+                        self.scheduled = False
+                        return
+                    future, function, args = self.mailbox.popleft()
+                
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(function(*args))
+                except BaseException as error:
+                    future.set_exception(error)
+        finally:
+            local.actor = None
+        
+        # Budget exhausted: let other games run before continuing
+        self.executor.schedule(self)
@@ -1,10 +1,16 @@
 
 from .game_state import GameState
 from .move_resolver import MoveResolver
+from .game_actor import GameExecutor, GameActor
+import heapq
+import os
 import threading
 import time
 from datetime import datetime
 
+# Worker threads running the games' actors
+DEFAULT_GAME_WORKERS = min(8, os.cpu_count() or 2)
+
 class GameEngine:
     _instance = None
     
@@ -21,18 +27,33 @@ class GameEngine:
         else:
             self.games = {}  # id_party -> GameState
             self.move_resolvers = {}  # id_party -> MoveResolver
+            # Each game's state is only touched by its actor; games run in parallel on the pool
+            self.executor = GameExecutor(DEFAULT_GAME_WORKERS)
+            self.actors = {}  # id_party -> GameActor
+            self.games_lock = threading.Lock()  # guards the games, move_resolvers and actors dicts
             self.next_game_id = 1
+            self.game_id_step = 1  # > 1 when game ids are sharded across workers
             self.running = True
+            self.turn_deadlines = []  # min-heap of (deadline, id_party, turn) on time.monotonic()
+            self.turn_condition = threading.Condition()  # wakes the monitor when a deadline is added
+            self.early_resolution = True  # end a turn as soon as every living player has moved
+            self.early_resolution_grace = 0.0  # seconds left to players to change their move
+            self.early_turn_ends = {}  # id_party -> turn whose early end is already scheduled
+            self.alive_counts = {}  # id_party -> (turn, living players during that turn)
             self.turn_monitor_thread = threading.Thread(target=self._monitor_turns)
             self.turn_monitor_thread.daemon = True
             self.turn_monitor_thread.start()
             self.game_end_callbacks = []  # list of functions to call when games end
             self.turn_end_callbacks = []  # list of functions to call when turns end
     
-    def create_game(self, title, rows, cols, max_time_per_turn, num_turns, num_obstacles, max_players):
-        """Create a new game with the specified parameters"""
-        id_party = self.next_game_id
-        self.next_game_id += 1
+    def create_game(self, title, rows, cols, max_time_per_turn, num_turns, num_obstacles, max_players, view_radius=None):
+        """
+        Create a new game with the specified parameters
+        With a view_radius, players only see the cells within view_radius steps of them
+        """
+        with self.games_lock:
+            id_party = self.next_game_id
+            self.next_game_id += self.game_id_step
         
         game_state = GameState(
             id_party,
@@ -42,19 +63,53 @@ class GameEngine:
             max_time_per_turn, 
             num_turns, 
             num_obstacles, 
-            max_players
+            max_players,
+            view_radius
         )
-        self.games[id_party] = game_state
-        self.move_resolvers[id_party] = MoveResolver(game_state)
+        with self.games_lock:
+            self.actors[id_party] = GameActor(self.executor, id_party)
+            self.move_resolvers[id_party] = MoveResolver(game_state)
+            self.games[id_party] = game_state
         
         return id_party
     
+    def _actor_of(self, id_party):
+        """Actor of a game, or None if the game does not exist"""
+        with self.games_lock:
+            return self.actors.get(id_party)
+    
+    def _run_on_game(self, id_party, not_found, function, *args):
+        """
+        Run function(game_state, move_resolver, *args) on the game's actor and wait for the result
+        Returns not_found if the game does not exist
+        """
+        actor = self._actor_of(id_party)
+        if actor is None:
+            return not_found
+        return actor.call(self._with_game, id_party, not_found, function, args)
+    
+    def _with_game(self, id_party, not_found, function, args):
+        """Look the game up from its actor and run function on it"""
+        game_state = self.games.get(id_party)
+        move_resolver = self.move_resolvers.get(id_party)
+        if game_state is None or move_resolver is None:
+            return not_found
+        return function(game_state, move_resolver, *args)
+    
+    def configure_shard(self, shard_index, shard_count):
+        """Only allocate game ids owned by this shard: (id_party - 1) % shard_count == shard_index"""
+        self.game_id_step = shard_count
+        first_id = shard_index + 1
+        while first_id < self.next_game_id:
+            first_id += shard_count
+        self.next_game_id = first_id
+    
     def add_player_to_game(self, id_party, player_name):
         """Add a player to an existing game"""
-        if id_party not in self.games:
-            return None, "Game not found"
-        
-        game_state = self.games[id_party]
+        return self._run_on_game(id_party, (None, "Game not found"), self._add_player, player_name)
+    
+    def _add_player(self, game_state, move_resolver, player_name):
+        """Add a player to a game (on the game's actor)"""
         player, error = game_state.add_player(player_name)
         
         if player:
@@ -67,22 +122,23 @@ class GameEngine:
     
     def start_game(self, id_party):
         """Start a game if it has enough players"""
-        if id_party not in self.games:
-            return False, "Game not found"
-        
-        game_state = self.games[id_party]
+        return self._run_on_game(id_party, (False, "Game not found"), self._start_game)
+    
+    def _start_game(self, game_state, move_resolver):
+        """Start a game (on the game's actor)"""
+        id_party = game_state.id_party
         if game_state.start_game():
+            self._schedule_turn_end(id_party, game_state)
             return True, None
         else:
             return False, "Not enough players to start game"
     
     def get_party_status(self, id_party, id_player=None):
         """Get the current status of a game"""
-        if id_party not in self.games:
-            return None, "Game not found"
-        
-        game_state = self.games[id_party]
-        
+        return self._run_on_game(id_party, (None, "Game not found"), self._party_status, id_player)
+    
+    def _party_status(self, game_state, move_resolver, id_player=None):
+        """Build the status of an already resolved game (on the game's actor)"""
         result = {
             "id_party": game_state.id_party,
             "started": game_state.started,
@@ -102,23 +158,46 @@ class GameEngine:
         
         return result, None
     
-    def get_gameboard_status(self, id_party, id_player=None):
-        """Get the current status of a game board"""
-        if id_party not in self.games:
-            return None, "Game not found"
+    def get_gameboard_status(self, id_party, id_player=None, viewer=None):
+        """
+        Get the current status of a game board
+        viewer is the player bound to the caller's connection; with fog of war
+        only that player's own view is served
+        """
+        return self._run_on_game(id_party, (None, "Game not found"), self._gameboard_status, id_player, viewer)
+    
+    def _gameboard_status(self, game_state, move_resolver, id_player=None, viewer=None):
+        """Build the board status of an already resolved game (on the game's actor)"""
+        if game_state.view_radius is None:
+            visible_cells = game_state.board.get_visible_cells()
+            
+            return {"visible_cells": visible_cells}, None
         
-        game_state = self.games[id_party]
-        visible_cells = game_state.board.get_visible_cells()
+        # Fog of war: only the window around the player, hidden cells as '?'
+        # The player's own position is only sent here (turn_end notifications leave it out)
+        if id_player != viewer:
+            return None, "View restricted to the player's own connection"
+        view = game_state.board.get_view(id_player, game_state.view_radius)
+        if view is None:
+            return None, "Player not found"
         
-        return {"visible_cells": visible_cells}, None
+        top, left, rows, cols, visible_cells = view
+        row, col = game_state.board.players[id_player].position
+        return {
+            "visible_cells": visible_cells,
+            "origin": {"row": top, "col": left},
+            "rows": rows,
+            "cols": cols,
+            "position": {"row": row, "col": col},
+            "view_radius": game_state.view_radius
+        }, None
     
     def add_move(self, id_party, id_player, move_str):
         """Add a move for a player in a game"""
-        if id_party not in self.games or id_party not in self.move_resolvers:
-            return False, "Game not found"
-            
-        game_state = self.games[id_party]
-        
+        return self._run_on_game(id_party, (False, "Game not found"), self._add_move, id_player, move_str)
+    
+    def _add_move(self, game_state, move_resolver, id_player, move_str):
+        """Add a move for a player of an already resolved game (on the game's actor)"""
         # Check if game has started
         if not game_state.started:
             return False, "Game not started"
@@ -133,8 +212,8 @@ class GameEngine:
             return False, "Player is eliminated"
             
         # Add move to resolver
-        move_resolver = self.move_resolvers[id_party]
         if move_resolver.add_move(id_player, move_str):
+            self._check_early_turn_end(game_state, move_resolver)
             return {
                 "round_in_progress": game_state.current_turn,
                 "move": {
@@ -147,30 +226,129 @@ class GameEngine:
         else:
             return False, "Invalid move format"
     
+    def configure_early_resolution(self, enabled=True, grace=0.0):
+        """Enable or disable ending turns once all living players have moved, after an optional grace delay"""
+        self.early_resolution = enabled
+        self.early_resolution_grace = grace
+    
+    def _check_early_turn_end(self, game_state, move_resolver):
+        """Schedule the end of the turn now (or after the grace delay) if every living player has moved"""
+        if not self.early_resolution:
+            return
+        
+        id_party = game_state.id_party
+        turn = game_state.current_turn
+        if self.early_turn_ends.get(id_party) == turn:
+            return
+        
+        # Players only die when a turn is resolved: count them once per turn
+        cached = self.alive_counts.get(id_party)
+        if cached is None or cached[0] != turn:
+            cached = (turn, game_state.board.count_alive())
+            self.alive_counts[id_party] = cached
+        
+        if len(move_resolver.pending_moves) >= cached[1]:
+            self.early_turn_ends[id_party] = turn
+            self._schedule_turn_end(id_party, game_state, self.early_resolution_grace)
+    
+    def execute_batch(self, id_party, operations, viewer=None):
+        """
+        Run several operations against one game with a single lookup
+        operations is a list of (action, id_player, move_str) where action is
+        "party_status", "gameboard_status" or "move"; returns a list of (result, error)
+        viewer is passed to gameboard_status (see get_gameboard_status)
+        The whole batch is a single task of the game's actor
+        """
+        not_found = [(None, "Game not found")] * len(operations)
+        return self._run_on_game(id_party, not_found, self._execute_batch, operations, viewer)
+    
+    def _execute_batch(self, game_state, move_resolver, operations, viewer=None):
+        """Run the operations of a batch (on the game's actor)"""
+        results = []
+        for action, id_player, move_str in operations:
+            if action == "party_status":
+                results.append(self._party_status(game_state, move_resolver, id_player))
+            elif action == "gameboard_status":
+                results.append(self._gameboard_status(game_state, move_resolver, id_player, viewer))
+            elif action == "move":
+                results.append(self._add_move(game_state, move_resolver, id_player, move_str))
+            else:
+                results.append((None, f"Unsupported batch action: {action}"))
+        return results
+    
+    def _schedule_turn_end(self, id_party, game_state, delay=None):
+        """Schedule the end of the current turn of a game and wake the monitor"""
+        if delay is None:
+            delay = game_state.max_time_per_turn
+        with self.turn_condition:
+            heapq.heappush(self.turn_deadlines, (time.monotonic() + delay, id_party, game_state.current_turn))
+            self.turn_condition.notify()
+    
+    def _next_due_turn(self):
+        """
+        Sleep until the earliest turn deadline and pop it
+        Returns (id_party, turn) or None when the engine is shut down
+        """
+        with self.turn_condition:
+            while self.running:
+                if not self.turn_deadlines:
+                    self.turn_condition.wait()
+                    continue
+                
+                deadline, id_party, turn = self.turn_deadlines[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    # Woken early if a game starts with an earlier deadline
+                    self.turn_condition.wait(remaining)
+                    continue
+                
+                heapq.heappop(self.turn_deadlines)
+                return id_party, turn
+        return None
+    
     def _monitor_turns(self):
-        """Monitor game turns and resolve moves when turns end"""
+        """Resolve moves when turns end, sleeping until the next turn deadline"""
         while self.running:
-            for id_party, game_state in list(self.games.items()):
-                if game_state.started and game_state.is_turn_over():
-                    # Resolve moves for this turn
-                    if id_party in self.move_resolvers:
-                        move_results = self.move_resolvers[id_party].resolve_moves()
-                        # Notify any listeners that moves were resolved
-                        for callback in self.turn_end_callbacks:
-                            callback(id_party, game_state.current_turn, move_results)
-                    
-                    # Advance to next turn
-                    game_state.next_turn()
-                    
-                    # Check if game is over
-                    game_over, winner = game_state.check_game_over()
-                    if game_over:
-                        # Notify any listeners that game ended
-                        for callback in self.game_end_callbacks:
-                            callback(id_party, winner)
+            due = self._next_due_turn()
+            if due is None:
+                return
             
-            # Sleep to avoid high CPU usage
-            time.sleep(0.5)
+            # Resolve the turn on the game's actor: turns of different games end in parallel
+            id_party, turn = due
+            actor = self._actor_of(id_party)
+            if actor is not None:
+                actor.tell(self._end_turn, id_party, turn)
+    
+    def _end_turn(self, id_party, turn):
+        """Resolve a turn of a game, notify listeners and schedule the next one (on the game's actor)"""
+        game_state = self.games.get(id_party)
+        move_resolver = self.move_resolvers.get(id_party)
+        # Stale deadline: the game was removed, ended or already moved past this turn
+        if game_state is None or not game_state.started or game_state.current_turn != turn:
+            return
+        
+        # Resolve moves for this turn
+        if move_resolver is not None:
+            move_results = move_resolver.resolve_moves()
+            # Notify any listeners that moves were resolved
+            for callback in self.turn_end_callbacks:
+                callback(id_party, game_state.current_turn, move_results)
+        
+        # Advance to next turn
+        game_state.next_turn()
+        
+        # Check if game is over
+        game_over, winner = game_state.check_game_over()
+        if game_over:
+            # Notify any listeners that game ended
+            for callback in self.game_end_callbacks:
+                callback(id_party, winner)
+        
+        if game_state.started:
+            self._schedule_turn_end(id_party, game_state)
+        else:
+            self.early_turn_ends.pop(id_party, None)
+            self.alive_counts.pop(id_party, None)
     
     def register_game_end_callback(self, callback):
         """Register a callback function to be called when a game ends"""
@@ -182,18 +360,35 @@ class GameEngine:
     
     def get_open_games(self):
         """Get list of games that haven't started yet"""
+        with self.games_lock:
+            games = list(self.games.items())
         open_games = []
-        for id_party, game_state in self.games.items():
+        for id_party, game_state in games:
             if not game_state.started:
                 open_games.append(id_party)
         return open_games
     
+    def get_game_count(self):
+        """Number of games currently held by the engine"""
+        with self.games_lock:
+            return len(self.games)
+    
+    def count_alive_players(self):
+        """Number of living players over all games (each game counted on its actor)"""
+        with self.games_lock:
+            id_parties = list(self.games)
+        return sum(self._run_on_game(id_party, 0, self._alive_players) for id_party in id_parties)
+    
+    def _alive_players(self, game_state, move_resolver):
+        """Count the living players of a game (on the game's actor)"""
+        return game_state.board.count_alive()
+    
     def get_game_details(self, id_party):
         """Get detailed information about a game"""
-        if id_party not in self.games:
-            return None
-            
-        game_state = self.games[id_party]
+        return self._run_on_game(id_party, None, self._game_details)
+    
+    def _game_details(self, game_state, move_resolver):
+        """Build the details of a game (on the game's actor)"""
         return {
             "id_party": game_state.id_party,
             "title": game_state.title,
@@ -203,13 +398,55 @@ class GameEngine:
             "max_turns": game_state.max_turns,
             "num_obstacles": game_state.num_obstacles,
             "max_players": game_state.max_players,
+            "view_radius": game_state.view_radius,
             "current_turn": game_state.current_turn,
             "started": game_state.started,
-            "player_count": game_state.player_count
+            "player_count": dict(game_state.player_count)
+        }
+    
+    def export_state(self):
+        """Snapshot of the games, to be restored by another process (call after shutdown)"""
+        # Wait for the tasks already queued on each game (e.g. a turn being resolved)
+        with self.games_lock:
+            actors = list(self.actors.values())
+        for actor in actors:
+            actor.call(lambda: None)
+        
+        return {
+            "games": self.games,
+            "move_resolvers": self.move_resolvers,
+            "next_game_id": self.next_game_id,
+            "game_id_step": self.game_id_step
         }
     
+    def import_state(self, state):
+        """Take over the games exported by another process"""
+        with self.games_lock:
+            self.games = state["games"]
+            self.move_resolvers = state["move_resolvers"]
+            self.actors = {id_party: GameActor(self.executor, id_party) for id_party in self.games}
+            self.next_game_id = state["next_game_id"]
+            self.game_id_step = state["game_id_step"]
+        
+        # Turn deadlines are process-local: rebuild them from the wall-clock turn start
+        for id_party, game_state in self.games.items():
+            if game_state.started and game_state.turn_start_time is not None:
+                elapsed = (datetime.now() - game_state.turn_start_time).total_seconds()
+                self._schedule_turn_end(id_party, game_state, max(0.0, game_state.max_time_per_turn - elapsed))
+    
+    def resume(self):
+        """Restart the turn monitor after a shutdown"""
+        if self.turn_monitor_thread.is_alive():
+            return
+        self.running = True
+        self.turn_monitor_thread = threading.Thread(target=self._monitor_turns)
+        self.turn_monitor_thread.daemon = True
+        self.turn_monitor_thread.start()
+    
     def shutdown(self):
         """Shutdown the game engine"""
-        self.running = False
+        with self.turn_condition:
+            self.running = False
+            self.turn_condition.notify_all()
         if self.turn_monitor_thread.is_alive():
             self.turn_monitor_thread.join(timeout=2)
\ No newline at end of file
@@ -1,4 +1,6 @@
+from array import array
 from enum import Enum
+from functools import lru_cache
 import random
 import time
 from datetime import datetime
@@ -10,118 +12,290 @@ class CellType(Enum):
     OBSTACLE = 3
 
 class Player:
+    """
+    Once placed on a board, a player's position and alive flag live in the
+    board's per-player arrays (at index slot); the properties read them there
+    """
+    __slots__ = ("id_player", "player_name", "role", "is_npc", "board", "slot", "_position", "_is_alive")
+    
     def __init__(self, id_player, player_name, role):
         self.id_player = id_player
         self.player_name = player_name
         self.role = role
-        self.position = None
-        self.is_alive = True
         self.is_npc = False
+        self.board = None  # GameBoard the player was added to
+        self.slot = -1  # index in the board's per-player arrays
+        self._position = None
+        self._is_alive = True
+    
+    @property
+    def position(self):
+        if self.board is None:
+            return self._position
+        return (self.board.player_rows[self.slot], self.board.player_cols[self.slot])
+    
+    @position.setter
+    def position(self, position):
+        if self.board is None:
+            self._position = position
+        else:
+            self.board.player_rows[self.slot], self.board.player_cols[self.slot] = position
+    
+    @property
+    def is_alive(self):
+        if self.board is None:
+            return self._is_alive
+        return self.board.living_roles[self.slot] != EMPTY
+    
+    @is_alive.setter
+    def is_alive(self, is_alive):
+        if self.board is None:
+            self._is_alive = is_alive
+        else:
+            self.board.living_roles[self.slot] = self.board.player_roles[self.slot] if is_alive else EMPTY
+
+# Raw cell values stored in the board grid
+EMPTY = CellType.EMPTY.value
+VILLAGER = CellType.VILLAGER.value
+WOLF = CellType.WOLF.value
+OBSTACLE = CellType.OBSTACLE.value
+
+# Player roles as stored in the board's per-player arrays
+ROLE_VALUES = {"villager": VILLAGER, "wolf": WOLF}
+
+# Encoded value of the cells outside a player's view
+HIDDEN = ord("?")
+
+@lru_cache(maxsize=None)
+def view_mask(radius):
+    """
+    Visibility mask of a view radius: for each row offset from -radius to radius,
+    the half-width of the visible columns (cells within radius steps of the player)
+    """
+    return tuple((row_offset, radius - abs(row_offset)) for row_offset in range(-radius, radius + 1))
 
 class GameBoard:
     def __init__(self, rows, cols, num_obstacles):
         self.rows = rows
         self.cols = cols
-        self.grid = [[CellType.EMPTY for _ in range(cols)] for _ in range(rows)]
+        # One byte per cell (CellType value), row-major: cell (row, col) is at row * cols + col
+        self.grid = array('B', bytes(rows * cols))
+        # Board as returned by get_visible_cells (one ASCII digit per cell), kept in sync with the grid
+        self.encoded = bytearray(b"0" * (rows * cols))
+        # Empty cells, in no particular order, and the slot of each cell in that list (-1 if not empty)
+        self.free_cells = list(range(rows * cols))
+        self.free_slots = array('i', range(rows * cols))
+        self.view_cache = {}  # (id_player, radius) -> view, dropped whenever a cell or a player position changes
         self.players = {}  # id_player -> Player
+        # Per-player arrays, indexed by Player.slot
+        self.player_ids = array('I')
+        self.player_rows = array('i')
+        self.player_cols = array('i')
+        self.player_roles = bytearray()  # ROLE_VALUES of the role
+        self.living_roles = bytearray()  # same as player_roles, EMPTY once eliminated
+        self.occupants = {}  # cell index -> set of living id_player on the cell
+        self.touched = set()  # cell indexes entered by a player since the last resolve_eliminations
         self._place_obstacles(num_obstacles)
+    
+    def _set(self, index, value):
+        """Write a raw cell value to the grid, its encoded copy and the free-cell index"""
+        was_empty = self.grid[index] == EMPTY
+        self.grid[index] = value
+        self.encoded[index] = 0x30 + value
+        if was_empty and value != EMPTY:
+            # Swap-remove from the free cells
+            slot = self.free_slots[index]
+            last = self.free_cells.pop()
+            if last != index:
+                self.free_cells[slot] = last
+                self.free_slots[last] = slot
+            self.free_slots[index] = -1
+        elif value == EMPTY and not was_empty:
+            self.free_slots[index] = len(self.free_cells)
+            self.free_cells.append(index)
+        if self.view_cache:
+            self.view_cache.clear()
+    
+    def _enter(self, player, index):
+        """Put a living player on a cell"""
+        occupants = self.occupants.get(index)
+        if occupants is None:
+            occupants = self.occupants[index] = set()
+        occupants.add(player.id_player)
+        self.touched.add(index)
+        self._refresh_cell(index)
+    
+    def _refresh_cell(self, index):
+        """Recompute a cell from its occupants (a wolf hides the villagers sharing its cell)"""
+        occupants = self.occupants.get(index)
+        if not occupants:
+            value = EMPTY
+        elif any(self.player_roles[self.players[id_player].slot] == WOLF for id_player in occupants):
+            value = WOLF
+        else:
+            value = VILLAGER
+        if self.grid[index] != value:
+            self._set(index, value)
 
     def _place_obstacles(self, num_obstacles):
-        """Place obstacles randomly on the game board"""
-        placed = 0
-        while placed < num_obstacles:
-            row = random.randint(0, self.rows - 1)
-            col = random.randint(0, self.cols - 1)
-            if self.grid[row][col] == CellType.EMPTY:
-                self.grid[row][col] = CellType.OBSTACLE
-                placed += 1
+        """Place obstacles randomly on the game board (at most on every empty cell)"""
+        # Sample without replacement, then rebuild the free-cell index once
+        for index in random.sample(self.free_cells, min(num_obstacles, len(self.free_cells))):
+            self.grid[index] = OBSTACLE
+            self.encoded[index] = 0x30 + OBSTACLE
+            self.free_slots[index] = -1
+        
+        self.free_cells = [index for index in self.free_cells if self.free_slots[index] != -1]
+        for slot, index in enumerate(self.free_cells):
+            self.free_slots[index] = slot
 
     def add_player(self, player, row=None, col=None):
-        """Add a player to the game board at the given position or randomly"""
+        """
+        Add a player to the game board at the given position or randomly
+        Returns False if there is no empty cell left
+        """
         if row is None or col is None:
-            # Find a random empty cell
-            valid_position = False
-            while not valid_position:
-                row = random.randint(0, self.rows - 1)
-                col = random.randint(0, self.cols - 1)
-                if self.grid[row][col] == CellType.EMPTY:
-                    valid_position = True
-        
-        # Place the player
-        player.position = (row, col)
+            # Pick a random empty cell
+            if not self.free_cells:
+                return False
+            row, col = divmod(random.choice(self.free_cells), self.cols)
+        
+        # Place the player: its position and alive flag move to the board's arrays
+        role_value = ROLE_VALUES[player.role]
+        player.slot = len(self.player_ids)
+        self.player_ids.append(player.id_player)
+        self.player_rows.append(row)
+        self.player_cols.append(col)
+        self.player_roles.append(role_value)
+        self.living_roles.append(role_value if player.is_alive else EMPTY)
+        player.board = self
         self.players[player.id_player] = player
         
-        # Update the grid
-        cell_type = CellType.VILLAGER if player.role == "villager" else CellType.WOLF
-        self.grid[row][col] = cell_type
+        # Update the occupancy index and the grid
+        self._enter(player, row * self.cols + col)
         
         return True
     
     def move_player(self, player_id, row_offset, col_offset):
         """Move player by the given offset if valid"""
-        if player_id not in self.players:
-            return False
-            
-        player = self.players[player_id]
-        if not player.is_alive or player.is_npc:
-            return False
-            
-        current_row, current_col = player.position
-        new_row = current_row + row_offset
-        new_col = current_col + col_offset
+        return player_id in self.move_players({player_id: (row_offset, col_offset)})
+    
+    def move_players(self, moves):
+        """
+        Apply the moves of a turn in one pass; moves maps id_player -> (row_offset, col_offset)
+        A move is a single step in one direction; only obstacles block it and players may
+        share a cell, so moves do not depend on each other: all are validated first, then
+        the occupancy index is updated and each changed cell is recomputed once
+        Returns the set of id_player whose move was applied
+        """
+        rows, cols = self.rows, self.cols
+        grid, player_rows, player_cols, living_roles = self.grid, self.player_rows, self.player_cols, self.living_roles
         
-        # Check if move is valid (single step in one direction)
-        if (abs(row_offset) + abs(col_offset) != 1):
-            return False
-            
-        # Check if new position is within bounds
-        if new_row < 0 or new_row >= self.rows or new_col < 0 or new_col >= self.cols:
-            return False
-            
-        # Check if new position contains an obstacle
-        if self.grid[new_row][new_col] == CellType.OBSTACLE:
-            return False
-            
-        # Update the grid - remove player from old position
-        self.grid[current_row][current_col] = CellType.EMPTY
+        applied = []  # (id_player, slot, old index, new index)
+        for player_id, (row_offset, col_offset) in moves.items():
+            player = self.players.get(player_id)
+            if player is None or player.is_npc or abs(row_offset) + abs(col_offset) != 1:
+                continue
+            slot = player.slot
+            if not living_roles[slot]:
+                continue
+            new_row = player_rows[slot] + row_offset
+            new_col = player_cols[slot] + col_offset
+            if new_row < 0 or new_row >= rows or new_col < 0 or new_col >= cols:
+                continue
+            new_index = new_row * cols + new_col
+            if grid[new_index] == OBSTACLE:
+                continue
+            applied.append((player_id, slot, player_rows[slot] * cols + player_cols[slot], new_index))
         
-        # Update player position
-        player.position = (new_row, new_col)
+        changed = set()
+        for player_id, slot, old_index, new_index in applied:
+            occupants = self.occupants[old_index]
+            occupants.discard(player_id)
+            if not occupants:
+                del self.occupants[old_index]
+            occupants = self.occupants.get(new_index)
+            if occupants is None:
+                occupants = self.occupants[new_index] = set()
+            occupants.add(player_id)
+            player_rows[slot], player_cols[slot] = divmod(new_index, cols)
+            changed.add(old_index)
+            changed.add(new_index)
         
-        # Update the grid - add player to new position
-        cell_type = CellType.VILLAGER if player.role == "villager" else CellType.WOLF
-        self.grid[new_row][new_col] = cell_type
+        # The views of the moved players change even if no cell value does (stacked players)
+        if applied:
+            self.view_cache.clear()
+        self.touched.update(new_index for _, _, _, new_index in applied)
+        for index in changed:
+            self._refresh_cell(index)
         
-        return True
+        return {player_id for player_id, _, _, _ in applied}
+    
+    def count_alive(self, role=None):
+        """Number of living players, optionally of one role"""
+        if role is None:
+            return len(self.living_roles) - self.living_roles.count(EMPTY)
+        return self.living_roles.count(ROLE_VALUES[role])
     
     def get_visible_cells(self):
         """Return a string representation of the current game board state"""
-        result = ""
-        for row in self.grid:
-            for cell in row:
-                result += str(cell.value)
-        return result
+        return self.encoded.decode('ascii')
     
-    def resolve_eliminations(self):
-        """Resolve eliminations - villagers on the same cell as wolves are eliminated"""
-        positions = {}  # (row, col) -> [player_ids]
+    def get_view(self, player_id, radius):
+        """
+        Return the part of the board a player can see, as (top, left, rows, cols, cells)
+        cells covers the bounding box of the view, cells out of range are encoded as '?'
+        Returns None if the player is not on the board
+        """
+        key = (player_id, radius)
+        view = self.view_cache.get(key)
+        if view is not None:
+            return view
+        
+        player = self.players.get(player_id)
+        if player is None or player.position is None:
+            return None
         
-        # Group players by position
-        for player in self.players.values():
-            if player.is_alive:
-                pos = player.position
-                if pos not in positions:
-                    positions[pos] = []
-                positions[pos].append(player.id_player)
+        row, col = player.position
+        top, left = max(0, row - radius), max(0, col - radius)
+        height = min(self.rows, row + radius + 1) - top
+        width = min(self.cols, col + radius + 1) - left
+        
+        # Copy each visible span of the mask from the encoded board
+        cells = bytearray((HIDDEN,)) * (height * width)
+        for row_offset, half_width in view_mask(radius):
+            board_row = row + row_offset
+            if board_row < 0 or board_row >= self.rows:
+                continue
+            start = max(0, col - half_width)
+            end = min(self.cols, col + half_width + 1)
+            offset = (board_row - top) * width + start - left
+            cells[offset:offset + end - start] = self.encoded[board_row * self.cols + start:board_row * self.cols + end]
+        
+        view = (top, left, height, width, cells.decode('ascii'))
+        self.view_cache[key] = view
+        return view
+    
+    def resolve_eliminations(self):
+        """
+        Resolve eliminations - villagers on the same cell as wolves are eliminated
+        Only the cells entered since the last call can hold a new wolf/villager pair
+        """
+        touched, self.touched = self.touched, set()
         
         # Check for eliminations - if wolf and villager are on the same cell
         eliminated = []
-        for pos, player_ids in positions.items():
-            if len(player_ids) > 1:
-                wolves = [p_id for p_id in player_ids if self.players[p_id].role == "wolf"]
-                villagers = [p_id for p_id in player_ids if self.players[p_id].role == "villager"]
-                if wolves and villagers:
-                    eliminated.extend(villagers)
+        for index in sorted(touched):
+            player_ids = self.occupants.get(index)
+            if player_ids is None or len(player_ids) < 2:
+                continue
+            roles = {p_id: self.player_roles[self.players[p_id].slot] for p_id in player_ids}
+            wolves = [p_id for p_id, role in roles.items() if role == WOLF]
+            villagers = sorted(p_id for p_id, role in roles.items() if role == VILLAGER)
+            if wolves and villagers:
+                eliminated.extend(villagers)
+                # Only the wolves remain on the cell
+                player_ids.difference_update(villagers)
         
         # Mark eliminated players
         for player_id in eliminated:
@@ -130,9 +304,10 @@ class GameBoard:
         return eliminated
 
 class GameState:
-    def __init__(self, id_party, title, rows, cols, max_time_per_turn, num_turns, num_obstacles, max_players):
+    def __init__(self, id_party, title, rows, cols, max_time_per_turn, num_turns, num_obstacles, max_players, view_radius=None):
         self.id_party = id_party
         self.title = title
+        self.view_radius = view_radius  # None: every player sees the whole board
         self.rows = rows
         self.cols = cols
         self.max_time_per_turn = max_time_per_turn  # in seconds
@@ -206,8 +381,7 @@ class GameState:
         eliminated_players = self.board.resolve_eliminations()
         
         # Check game end conditions
-        villagers_alive = sum(1 for p in self.board.players.values() 
-                          if p.role == "villager" and p.is_alive)
+        villagers_alive = self.board.count_alive("villager")
         
         if villagers_alive == 0 or self.current_turn >= self.max_turns:
             self.started = False
@@ -221,8 +395,7 @@ class GameState:
     
     def check_game_over(self):
         """Check if the game is over and who won"""
-        villagers_alive = sum(1 for p in self.board.players.values() 
-                           if p.role == "villager" and p.is_alive)
+        villagers_alive = self.board.count_alive("villager")
         
         if villagers_alive == 0:
             return True, "wolf"
@@ -27,27 +27,28 @@ class MoveResolver:
     
     def resolve_moves(self):
         """Resolve all pending moves"""
+        board = self.game_state.board
         results = {}
         
-        # Process all pending moves
-        for player_id, (row_offset, col_offset) in self.pending_moves.items():
-            # Apply the move
-            success = self.game_state.board.move_player(player_id, row_offset, col_offset)
-            
-            # Record the result
-            if player_id in self.game_state.board.players:
-                player = self.game_state.board.players[player_id]
-                if success and player.is_alive:
-                    new_row, new_col = player.position
-                    results[player_id] = {
-                        "success": True,
-                        "position": {"row": new_row, "col": new_col}
-                    }
-                else:
-                    results[player_id] = {
-                        "success": False,
-                        "message": "Invalid move or player is dead"
-                    }
+        # Apply all pending moves in one pass
+        moved = board.move_players(self.pending_moves)
+        
+        # Record the results by walking the board's per-player arrays slot by slot
+        # (players unknown to the board are skipped)
+        # With fog of war the results are broadcast to every player: positions are left out
+        show_positions = self.game_state.view_radius is None
+        for slot, player_id in enumerate(board.player_ids):
+            if player_id not in self.pending_moves:
+                continue
+            if player_id in moved:
+                results[player_id] = {"success": True}
+                if show_positions:
+                    results[player_id]["position"] = {"row": board.player_rows[slot], "col": board.player_cols[slot]}
+            else:
+                results[player_id] = {
+                    "success": False,
+                    "message": "Invalid move or player is dead"
+                }
         
         # Clear pending moves
         self.pending_moves = {}
@@ -67,7 +67,8 @@ class HttpServer:
                 int(data['max_time_per_turn']),
                 int(data['num_turns']),
                 int(data['num_obstacles']),
-                int(data['max_players'])
+                int(data['max_players']),
+                int(data['view_radius']) if data.get('view_radius') is not None else None
             )
             
             return jsonify({"id_party": game_id}), 201
@@ -0,0 +1,163 @@
+"""
+Encodage binaire compact du protocole, négocié par connexion
+(action "negotiate" avec le paramètre {"encoding": "binary"})
+
+Chaque trame est préfixée par sa longueur (uint32 big-endian) puis
+commence par un opcode (uint8). Les entiers sont big-endian.
+
+Requêtes :
+    LIST              -
+    SUBSCRIBE         u32 id_party, nom du joueur (UTF-8, reste de la trame)
+    PARTY_STATUS      u32 id_party, u32 id_player
+    GAMEBOARD_STATUS  u32 id_party, u32 id_player
+    MOVE              u32 id_party, u32 id_player, i8 ligne, i8 colonne
+    JSON              requête JSON complète (toute autre action)
+
+Réponses : opcode de la requête, u8 statut (0 OK, 1 KO), puis
+    KO                message d'erreur (UTF-8)
+    LIST              u32 nombre, puis u32 id_party
+    SUBSCRIBE         u32 id_player, u8 rôle (0 villageois, 1 loup),
+                      jeton de reprise (ASCII, reste de la trame, vide si désactivé)
+    PARTY_STATUS      u32 id_party, u8 démarrée, i32 tour en cours,
+                      u8 déplacement présent, [i32 ligne, i32 colonne]
+    GAMEBOARD_STATUS  une cellule par octet (valeurs de CellType)
+    GAMEBOARD_VIEW    réponse à GAMEBOARD_STATUS pour une partie avec
+                      brouillard de guerre : u16 ligne, u16 colonne (coin
+                      de la fenêtre), u16 lignes, u16 colonnes, u16 ligne,
+                      u16 colonne (position du joueur), u8 distance de vue,
+                      puis une cellule par octet (0xFF : masquée)
+    MOVE              i32 tour en cours, i8 ligne, i8 colonne
+    JSON              réponse JSON complète
+
+Les notifications (fin de tour, fin de partie) utilisent l'opcode
+NOTIFICATION suivi du JSON de la notification.
+"""
+
+import json
+import struct
+
+from .protocol import Request, build_request
+
+OP_ERROR = 0x00
+OP_LIST = 0x01
+OP_SUBSCRIBE = 0x02
+OP_PARTY_STATUS = 0x03
+OP_GAMEBOARD_STATUS = 0x04
+OP_MOVE = 0x05
+OP_GAMEBOARD_VIEW = 0x06  # réponse uniquement
+OP_JSON = 0x7F
+OP_NOTIFICATION = 0x80
+
+STATUS_OK = 0
+STATUS_KO = 1
+
+ROLES = ("villager", "wolf")
+
+LENGTH = struct.Struct(">I")
+PARTY_PLAYER = struct.Struct(">II")
+MOVE = struct.Struct(">IIbb")
+PARTY_STATUS = struct.Struct(">IBiB")
+POSITION = struct.Struct(">ii")
+MOVE_RESULT = struct.Struct(">ibb")
+VIEW = struct.Struct(">HHHHHHB")
+HEADER = struct.Struct(">BB")
+
+# '0'..'9' -> 0..9 pour transmettre le plateau sous forme d'octets bruts, '?' (masquée) -> 0xFF
+_CELL_DIGITS = bytes.maketrans(b"0123456789?", bytes(range(10)) + b"\xff")
+
+class BinaryProtocolError(Exception):
+    """Trame binaire mal formée"""
+
+def frame(body):
+    """Préfixer un corps de trame par sa longueur"""
+    return LENGTH.pack(len(body)) + body
+
+def decode_request(body):
+    """
+    Décoder une trame de requête
+    Retourne un tuple (opcode, Request)
+    """
+    if not body:
+        raise BinaryProtocolError("Trame vide")
+    
+    opcode = body[0]
+    payload = memoryview(body)[1:]
+    try:
+        if opcode == OP_LIST:
+            return opcode, Request("list")
+        
+        if opcode == OP_SUBSCRIBE:
+            (id_party,) = struct.unpack_from(">I", payload)
+            player = bytes(payload[4:]).decode('utf-8')
+            return opcode, Request("subscribe", {"id_party": id_party, "player": player})
+        
+        if opcode in (OP_PARTY_STATUS, OP_GAMEBOARD_STATUS):
+            id_party, id_player = PARTY_PLAYER.unpack(payload)
+            action = "party_status" if opcode == OP_PARTY_STATUS else "gameboard_status"
+            return opcode, Request(action, {"id_party": id_party, "id_player": id_player})
+        
+        if opcode == OP_MOVE:
+            id_party, id_player, row, col = MOVE.unpack(payload)
+            return opcode, Request("move", {"id_party": id_party, "id_player": id_player,
+                                            "move": _format_offset(row) + _format_offset(col)})
+        
+        if opcode == OP_JSON:
+            message = json.loads(bytes(payload).decode('utf-8'))
+            if not isinstance(message, dict) or 'action' not in message:
+                raise BinaryProtocolError("Champ 'action' manquant")
+            return opcode, build_request(message)
+    except (struct.error, UnicodeDecodeError, ValueError) as e:
+        raise BinaryProtocolError(f"Trame invalide pour l'opcode {opcode}: {e}")
+    
+    raise BinaryProtocolError(f"Opcode inconnu: {opcode}")
+
+def _format_offset(offset):
+    """Convertir un décalage en caractère du protocole texte ('1', '0', '-')"""
+    return '-' if offset < 0 else str(offset)
+
+def encode_response_body(opcode, result):
+    """Encoder le résultat d'une action (corps de trame, sans le préfixe de longueur)"""
+    if not result.ok:
+        return HEADER.pack(opcode, STATUS_KO) + result.response.get("error", "").encode('utf-8')
+    
+    response = result.response
+    if opcode == OP_LIST:
+        id_parties = response["id_parties"]
+        body = LENGTH.pack(len(id_parties)) + struct.pack(f">{len(id_parties)}I", *id_parties)
+    elif opcode == OP_SUBSCRIBE:
+        body = struct.pack(">IB", response["id_player"], ROLES.index(response["role"]))
+        body += response.get("resume_token", "").encode('ascii')
+    elif opcode == OP_PARTY_STATUS:
+        party = response["party"]
+        move = party.get("move")
+        body = PARTY_STATUS.pack(party["id_party"], party["started"], party["round_in_progress"], move is not None)
+        if move is not None:
+            body += POSITION.pack(move["next_position"]["row"], move["next_position"]["col"])
+    elif opcode == OP_GAMEBOARD_STATUS and "origin" in response:
+        opcode = OP_GAMEBOARD_VIEW
+        body = VIEW.pack(response["origin"]["row"], response["origin"]["col"],
+                         response["rows"], response["cols"],
+                         response["position"]["row"], response["position"]["col"],
+                         min(response["view_radius"], 0xFF))
+        body += response["visible_cells"].encode('ascii').translate(_CELL_DIGITS)
+    elif opcode == OP_GAMEBOARD_STATUS:
+        body = response["visible_cells"].encode('ascii').translate(_CELL_DIGITS)
+    elif opcode == OP_MOVE:
+        position = response["move"]["next_position"]
+        body = MOVE_RESULT.pack(response["round_in_progress"], position["row"], position["col"])
+    else:
+        opcode = OP_JSON
+        body = result.to_json().encode('utf-8')
+    
+    return HEADER.pack(opcode, STATUS_OK) + body
+
+def encode_notification(payload):
+    """Encoder une notification en trame binaire"""
+    return frame(bytes((OP_NOTIFICATION,)) + json.dumps(payload).encode('utf-8'))
+
+def request_to_json(request):
+    """Reconstruire la requête JSON équivalente (transfert vers un autre worker)"""
+    return json.dumps({
+        "action": request.action,
+        "parameters": [{key: value} for key, value in request.params.items()]
+    })
@@ -1,134 +1,431 @@
-import json
 import socket
 import logging
 import threading
 import select
-from .protocol import Protocol
+import selectors
+from communication_module.framing import LineFramer, FrameTooLargeError
+from .outbound import OutboundQueue, OVERFLOW, DROPPED, COALESCED
+from .notification import EncodedNotification
+from . import binary_codec
+from . import compression
+from .protocol import Protocol, ActionResult
+
+# Délais suivis pour chaque connexion par la roue de temporisation du serveur
+TIMER_HANDSHAKE = "handshake"
+TIMER_IDLE = "idle"
+TIMER_SLOW_SENDER = "slow_sender"
 
 class ClientHandler:
     """Gestionnaire pour chaque connexion client TCP"""
     
-    def __init__(self, client_socket, client_address, server):
+    def __init__(self, client_socket, client_address, server, forwarded=False):
         self.client_socket = client_socket
         self.client_address = client_address
         self.server = server
-        self.protocol = Protocol()
+        self.forwarded = forwarded  # connexion transférée par un autre worker
+        self.upstreams = {}  # chemin du worker -> UpstreamConnection
+        self.protocol = Protocol(server.sessions)
         self.running = False
+        self.closed = False
+        self.suspended = False  # connexion en cours de transfert vers un nouveau processus
+        self.thread = None  # thread du client en mode un thread par client
+        self.event_loop = None  # boucle d'événements en mode réacteur
         self.player_id = None
         self.game_id = None
-        self.buffer = ""
+        self.session = None  # session du joueur (jeton de reprise)
+        self.framer = LineFramer(server.config.max_frame_size)
+        self.encoding = "json"  # négocié par le client avec l'action "negotiate"
+        self.compression = "none"  # idem
+        self.compressor = None  # flux deflate des réponses quand la compression est active
+        self.compress_lock = threading.Lock()  # les trames compressées doivent partir dans l'ordre du flux
+        self.outbound = OutboundQueue(server.config.outbound_high_water_mark, server.config.backpressure_policy)
+        self.handshaken = False  # un premier message complet a été reçu
+        self.partial_frame = False  # un message commencé attend sa fin
+        self.rate_bucket = server.rate_limiter.connection_bucket()
         self.lock = threading.Lock()
         self.logger = logging.getLogger(f"ClientHandler-{client_address}")
+        
+        # Les envois ne doivent jamais bloquer : les données en trop restent dans la file
+        self.client_socket.setblocking(False)
     
     def handle(self):
-        """Gérer la connexion client"""
+        """Gérer la connexion client (mode un thread par client)"""
         self.running = True
         self.client_socket.setblocking(False)
         
         try:
             while self.running:
                 # Utiliser select pour attendre des données sans bloquer
-                readable, _, exceptional = select.select([self.client_socket], [], [self.client_socket], 1.0)
+                # Surveiller aussi l'écriture tant que des données sont en attente d'envoi
+                writers = [self.client_socket] if self.outbound else []
+                readable, writable, exceptional = select.select([self.client_socket], writers, [self.client_socket], 1.0)
                 
                 if self.client_socket in exceptional:
                     self.logger.info(f"Connexion fermée par le client {self.client_address}")
                     break
                 
+                if self.client_socket in writable:
+                    self._flush_outbound()
+                
                 if self.client_socket in readable:
-                    data = self.client_socket.recv(4096)
-                    if not data:
-                        self.logger.info(f"Client déconnecté: {self.client_address}")
+                    if not self._read_available():
                         break
-                    
-                    # Ajouter les données au buffer
-                    self.buffer += data.decode('utf-8')
-                    
-                    # Traiter les messages complets dans le buffer
-                    self._process_buffer()
         except Exception as e:
             self.logger.error(f"Erreur lors du traitement du client {self.client_address}: {e}")
         finally:
+            # Une connexion transférée à un autre processus doit rester ouverte
+            if not self.suspended:
+                self.close()
+    
+    def attach(self, event_loop):
+        """Attacher le client à la boucle d'événements (mode réacteur)"""
+        self.event_loop = event_loop
+        self.running = True
+        self.client_socket.setblocking(False)
+        events = selectors.EVENT_READ
+        if self.outbound:
+            events |= selectors.EVENT_WRITE
+        event_loop.register(self.client_socket, events, self.on_ready)
+    
+    def on_ready(self, mask):
+        """Appelé par la boucle d'événements quand le socket est prêt"""
+        try:
+            if mask & selectors.EVENT_WRITE:
+                self._flush_outbound()
+            if mask & selectors.EVENT_READ and not self._read_available():
+                self.close()
+        except Exception as e:
+            self.logger.error(f"Erreur lors du traitement du client {self.client_address}: {e}")
             self.close()
     
+    def _read_available(self):
+        """Lire les données disponibles et traiter les messages complets
+        Retourne False si le client s'est déconnecté"""
+        try:
+            received = self.framer.recv_from(self.client_socket)
+        except BlockingIOError:
+            return True
+        
+        if not received:
+            self.logger.info(f"Client déconnecté: {self.client_address}")
+            return False
+        
+        # Traiter les messages complets dans le buffer
+        return self._process_buffer()
+    
     def _process_buffer(self):
-        """Traiter les messages JSON complets dans le buffer"""
-        while '\n' in self.buffer:
-            # Extraire le premier message complet
-            line, self.buffer = self.buffer.split('\n', 1)
-            
-            # Traiter le message
-            if line:
+        """Traiter les messages complets dans le buffer
+        Retourne False si la connexion doit être fermée"""
+        frames_received = 0
+        try:
+            for frame in self.framer.frames():
+                frames_received += 1
+                if self.encoding == "binary":
+                    self._handle_binary_frame(frame)
+                    continue
+                
+                if not frame:
+                    continue
+                
+                try:
+                    line = frame.decode('utf-8')
+                except UnicodeDecodeError:
+                    self._send_error("Encodage UTF-8 invalide")
+                    continue
+                
+                # Traiter le message
                 self._handle_message(line)
+        except FrameTooLargeError as e:
+            self.logger.warning(f"Message trop long de {self.client_address}: {e}")
+            self._send_error(f"Message trop long (maximum {e.max_frame_size} octets)")
+            return False
+        
+        self._track_activity(frames_received)
+        return True
+    
+    def start_timers(self):
+        """Armer le délai de la poignée de main (ou d'inactivité) d'une nouvelle connexion"""
+        # Le worker qui a accepté le client surveille déjà ses délais
+        if self.forwarded:
+            return
+        
+        config = self.server.config
+        if config.handshake_timeout and not self.handshaken:
+            self.server.timers.schedule((self, TIMER_HANDSHAKE), config.handshake_timeout)
+        else:
+            self._rearm_idle_timer()
+    
+    def _track_activity(self, frames_received):
+        """Réarmer les délais de la connexion après une lecture"""
+        if self.forwarded:
+            return
+        
+        config = self.server.config
+        timers = self.server.timers
+        
+        if frames_received:
+            if not self.handshaken:
+                self.handshaken = True
+                timers.cancel((self, TIMER_HANDSHAKE))
+            self._rearm_idle_timer()
+            # Le délai d'un message incomplet repart du début du message suivant
+            self.partial_frame = False
+        
+        # Un client qui envoie un message octet par octet ne doit pas occuper la connexion indéfiniment
+        if self.framer.pending():
+            if not self.partial_frame and config.slow_sender_timeout:
+                self.partial_frame = True
+                timers.schedule((self, TIMER_SLOW_SENDER), config.slow_sender_timeout)
+        elif self.partial_frame:
+            self.partial_frame = False
+            timers.cancel((self, TIMER_SLOW_SENDER))
+    
+    def _rearm_idle_timer(self):
+        """
+        Réarmer le délai d'inactivité, sauf pour une connexion associée à une partie :
+        un joueur peut attendre les notifications de fin de tour sans rien envoyer
+        """
+        timers = self.server.timers
+        if self.game_id is not None:
+            timers.cancel((self, TIMER_IDLE))
+        elif self.server.config.idle_timeout:
+            timers.schedule((self, TIMER_IDLE), self.server.config.idle_timeout)
+    
+    def suspend(self):
+        """
+        Arrêter de servir la connexion sans la fermer, avant son transfert
+        à un nouveau processus (le thread du client s'arrête au prochain tour)
+        """
+        self.suspended = True
+        self.running = False
+        self.cancel_timers()
+        if self.event_loop is not None:
+            self.event_loop.unregister(self.client_socket)
+    
+    def export_state(self):
+        """État de la connexion à transmettre au processus qui reprend le serveur"""
+        return {
+            "address": self.client_address,
+            "encoding": self.encoding,
+            "compression": self.compression,
+            "player_id": self.player_id,
+            "player": self.protocol.player,
+            "game_id": self.game_id,
+            "handshaken": self.handshaken,
+            "resume_token": self.session.token if self.session is not None else None,
+            "inbound": self.framer.pending_bytes(),
+            "outbound": self.outbound.pending_bytes()
+        }
+    
+    def restore_state(self, state):
+        """Reprendre l'état d'une connexion transmise par le processus précédent"""
+        self.set_encoding(state["encoding"])
+        # L'état du compresseur ne se transmet pas : nouveau flux, sans dictionnaire
+        self.set_compression(state["compression"], use_zdict=False)
+        self.player_id = state["player_id"]
+        self.protocol.player = state["player"]
+        self.handshaken = state["handshaken"]
+        if state["inbound"]:
+            self.framer.feed(state["inbound"])
+        if state["outbound"]:
+            self.outbound.push(state["outbound"])
+        if state["game_id"] is not None:
+            self.server.bind_client_to_game(self, state["game_id"])
+        if state["resume_token"] is not None:
+            self.session, _ = self.server.sessions.attach(state["resume_token"], self)
+    
+    def cancel_timers(self):
+        """Désarmer tous les délais de la connexion"""
+        for kind in (TIMER_HANDSHAKE, TIMER_IDLE, TIMER_SLOW_SENDER):
+            self.server.timers.cancel((self, kind))
+    
+    def on_timeout(self, kind):
+        """Appelé par le serveur quand un délai de la connexion a expiré"""
+        if self.closed:
+            return
+        
+        self.server.stats.increment(f"{kind}_timeouts")
+        self.logger.info(f"Délai dépassé ({kind}) pour {self.client_address}, déconnexion")
+        self._send_error(f"Délai dépassé: {kind}")
+        
+        if self.event_loop is None and self.running:
+            # Mode un thread par client : réveiller le thread du client, qui fermera la connexion
+            self.running = False
+            try:
+                self.client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+        
+        self.close()
     
     def _handle_message(self, message):
         """Traiter un message JSON du client"""
+        # Le message n'est analysé qu'une seule fois
+        request, result = self.protocol.parse_request(message)
+        if result is not None:
+            self.send_result(result)
+            return
+        
+        self._handle_request(request, message)
+    
+    def _handle_binary_frame(self, body):
+        """Traiter une trame du protocole binaire"""
+        try:
+            opcode, request = binary_codec.decode_request(body)
+        except binary_codec.BinaryProtocolError as e:
+            self._send_error(str(e))
+            return
+        
+        self._handle_request(request, opcode=opcode)
+    
+    def _handle_request(self, request, message=None, opcode=None):
+        """Exécuter une requête analysée et envoyer la réponse"""
         try:
-            # Utiliser le protocole pour traiter le message
-            response = self.protocol.handle_message(message)
+            # Limiter le débit avant toute exécution (le worker qui a accepté le client s'en charge)
+            if not self.forwarded:
+                retry_after = self.server.rate_limiter.check(self.rate_bucket, request, self.protocol.player)
+                if retry_after:
+                    self.server.stats.increment("requests_throttled")
+                    self.send_result(self.protocol.throttled_response(retry_after), opcode)
+                    return
             
-            # Envoyer la réponse au client
-            self.send_message(response)
+            # En mode pré-fork, les requêtes visant une partie d'un autre worker lui sont transmises
+            router = self.server.router
+            if router is not None and not self.forwarded:
+                if message is None:
+                    message = binary_codec.request_to_json(request)
+                if router.route(self, request, message, opcode):
+                    return
             
-            # Extraire les informations de jeu et de joueur si disponibles
-            self._update_game_info(message, response)
+            # Exécuter l'action via la table de dispatch du protocole
+            result = self.protocol.dispatch(request)
             
-        except Exception as e:
-            self.logger.error(f"Erreur lors du traitement du message: {e}")
-            error_response = json.dumps({
-                "status": "KO",
-                "response": {
-                    "error": "Erreur interne du serveur"
-                }
-            })
-            self.send_message(error_response)
-    
-    def _update_game_info(self, message, response):
-        """Mettre à jour les informations de jeu et de joueur"""
-        try:
-            message_json = json.loads(message)
-            response_json = json.loads(response)
+            # Envoyer la réponse au client (sérialisée une seule fois)
+            self.send_result(result, opcode)
             
-            # Si l'action était "subscribe" et la réponse est OK
-            if message_json.get('action') == 'subscribe' and response_json.get('status') == 'OK':
-                # Récupérer l'ID de la partie
-                for param in message_json.get('parameters', []):
-                    if 'id_party' in param:
-                        self.game_id = int(param['id_party'])
-                        break
-                
-                # Récupérer l'ID du joueur
-                if 'response' in response_json and 'id_player' in response_json['response']:
-                    self.player_id = response_json['response']['id_player']
+            # Appliquer les effets de l'action sur la session du client
+            self._apply_session(result)
             
-            # Si l'action concernait une partie spécifique
-            elif 'parameters' in message_json:
-                for param in message_json.get('parameters', []):
-                    if 'id_party' in param:
-                        self.game_id = int(param['id_party'])
-                        break
-                    
-                    if 'id_player' in param:
-                        self.player_id = int(param['id_player'])
-                        break
-        except:
-            pass
+        except Exception as e:
+            self.logger.error(f"Erreur lors du traitement du message: {e}")
+            self._send_error("Erreur interne du serveur")
+    
+    def send_result(self, result, opcode=None):
+        """Envoyer le résultat d'une action dans l'encodage de la connexion"""
+        if self.encoding == "binary":
+            self._send_payload(binary_codec.encode_response_body(binary_codec.OP_JSON if opcode is None else opcode, result))
+        else:
+            self.send_message(result.to_json())
+    
+    def _send_error(self, error_message):
+        """Envoyer une réponse d'erreur au client"""
+        error_response = ActionResult("KO", {"error": error_message})
+        self.send_result(error_response, binary_codec.OP_ERROR if self.encoding == "binary" else None)
+    
+    def _apply_session(self, result):
+        """Mettre à jour les informations de jeu et de joueur à partir du résultat d'une action"""
+        if result.game_id is not None:
+            self.server.bind_client_to_game(self, result.game_id)
+        if result.player_id is not None:
+            self.player_id = result.player_id
+        if result.encoding is not None:
+            self.set_encoding(result.encoding)
+        if result.compression is not None:
+            self.set_compression(result.compression)
+        if result.resume_token is not None:
+            self._attach_session(result.resume_token)
+    
+    def _attach_session(self, token):
+        """Rattacher la connexion à la session d'un joueur et renvoyer les notifications manquées"""
+        if self.session is not None and self.session.token != token:
+            self.server.sessions.detach(self.session, self)
+        
+        self.session, missed = self.server.sessions.attach(token, self)
+        if missed:
+            self.server.stats.increment("notifications_replayed", len(missed))
+        for notification in missed:
+            self.send_notification(notification)
+    
+    def set_encoding(self, encoding):
+        """Changer l'encodage des messages de la connexion ("json" ou "binary")"""
+        self.encoding = encoding
+        self.framer.use_length_prefix(encoding == "binary")
+    
+    def set_compression(self, mode, use_zdict=True):
+        """Activer ("deflate") ou désactiver ("none") la compression des réponses"""
+        with self.compress_lock:
+            self.compression = mode
+            if mode != "deflate":
+                self.compressor = None
+            elif self.compressor is None:
+                # Un flux déjà actif est conservé : le client continue avec le même décompresseur
+                self.compressor = compression.new_compressor(self.server.config.compression_level, use_zdict)
     
     def send_message(self, message):
-        """Envoyer un message au client"""
+        """Envoyer une réponse JSON au client sans bloquer"""
         try:
-            with self.lock:
-                if not message.endswith('\n'):
-                    message += '\n'
-                self.client_socket.sendall(message.encode('utf-8'))
+            self._send_payload(message.rstrip('\n').encode('utf-8'))
         except Exception as e:
             self.logger.error(f"Erreur lors de l'envoi du message: {e}")
             self.close()
     
+    def _send_payload(self, payload):
+        """Envoyer une réponse (JSON sans retour à la ligne, ou corps binaire) dans le format de trame de la connexion"""
+        # Compresser et mettre en file sous le même verrou : le client décompresse dans l'ordre d'envoi
+        with self.compress_lock:
+            if self.compressor is not None:
+                threshold = self.server.config.compression_threshold
+                data = compression.compressed_frame(self.compressor, payload, threshold)
+                self.send_frame(data)
+                if len(payload) >= threshold:
+                    self.server.stats.increment("compressed_bytes_in", len(payload))
+                    self.server.stats.increment("compressed_bytes_out", len(data))
+                return
+        
+        self.send_frame(binary_codec.frame(payload) if self.encoding == "binary" else payload + b'\n')
+    
+    def send_frame(self, data, coalesce_key=None, notification=False):
+        """Mettre une trame encodée dans la file d'envoi et envoyer ce qui peut l'être"""
+        with self.lock:
+            if self.closed:
+                return
+            result = self.outbound.push(data, coalesce_key, notification)
+            if result != OVERFLOW:
+                flushed = self.outbound.flush(self.client_socket)
+        
+        if result == OVERFLOW:
+            self.server.stats.increment("slow_client_disconnects")
+            self.logger.warning(f"Client {self.client_address} trop lent, déconnexion")
+            self.close()
+            return
+        
+        if result == DROPPED:
+            self.server.stats.increment("notifications_dropped")
+        elif result == COALESCED:
+            self.server.stats.increment("notifications_coalesced")
+        
+        # En mode réacteur, demander à être prévenu quand le socket redevient disponible
+        if not flushed and self.event_loop is not None:
+            self.event_loop.modify(self.client_socket, selectors.EVENT_READ | selectors.EVENT_WRITE, self.on_ready)
+    
+    def _flush_outbound(self):
+        """Envoyer les données en attente quand le socket est prêt en écriture"""
+        with self.lock:
+            if self.closed:
+                return
+            flushed = self.outbound.flush(self.client_socket)
+        
+        if flushed and self.event_loop is not None:
+            self.event_loop.modify(self.client_socket, selectors.EVENT_READ, self.on_ready)
+    
     def send_notification(self, notification):
-        """Envoyer une notification au client"""
+        """Envoyer une notification (dict ou EncodedNotification déjà sérialisée) au client"""
         try:
-            notification_str = json.dumps(notification)
-            self.send_message(notification_str)
+            if not isinstance(notification, EncodedNotification):
+                notification = EncodedNotification(notification, self.server.stats)
+            frame = notification.frame_for(self.encoding, length_prefixed=self.compressor is not None)
+            self.send_frame(frame, notification.coalesce_key, notification=True)
         except Exception as e:
             self.logger.error(f"Erreur lors de l'envoi de la notification: {e}")
     
@@ -138,8 +435,26 @@ class ClientHandler:
     
     def close(self):
         """Fermer la connexion client"""
+        # En mode réacteur, le socket ne doit être fermé que par la boucle
+        if self.event_loop is not None and not self.event_loop.in_loop_thread() and self.event_loop.running:
+            self.event_loop.call_soon_threadsafe(self.close)
+            return
+        
+        if self.closed:
+            return
+        self.closed = True
         self.running = False
         
+        for upstream in list(self.upstreams.values()):
+            upstream.close()
+        
+        self.cancel_timers()
+        if self.session is not None:
+            self.server.sessions.detach(self.session, self)
+        
+        if self.event_loop is not None:
+            self.event_loop.unregister(self.client_socket)
+        
         try:
             self.client_socket.close()
         except:
@@ -0,0 +1,57 @@
+"""
+Compression des réponses, négociée par connexion
+(action "negotiate" avec le paramètre {"compression": "deflate"})
+
+Une fois la compression activée, chaque trame envoyée par le serveur est
+préfixée par sa longueur (uint32 big-endian), y compris en encodage JSON
+(plus de '\\n' final). Le bit de poids fort de la longueur indique une
+trame compressée : les réponses d'au moins compression_threshold octets
+sont compressées en deflate brut (wbits -15) dans un flux unique par
+connexion, vidé (Z_SYNC_FLUSH) à chaque trame, avec le dictionnaire
+COMPRESSION_ZDICT. Le client décompresse toutes les trames compressées
+avec un seul zlib.decompressobj(-15, zdict=COMPRESSION_ZDICT), à recréer
+uniquement si la compression est désactivée puis réactivée.
+
+Les notifications ne sont jamais compressées : leur trame est partagée par
+tous les destinataires et peut être ignorée ou remplacée dans la file
+d'envoi, ce qui désynchroniserait le flux.
+"""
+
+import struct
+import zlib
+
+COMPRESSED_FLAG = 0x80000000
+LENGTH = struct.Struct(">I")
+
+# Fragments fréquents des réponses et notifications, en fin de dictionnaire
+# pour les plus fréquents (les distances courtes coûtent moins cher)
+COMPRESSION_ZDICT = (
+    b'{"notification": "game_end", "winner": "villager""wolf"'
+    b'{"error": "Game not found"'
+    b'{"id_parties": [{"party": {"started": true, "round_in_progress": '
+    b'{"id_player": "role": "resume_token": '
+    b'{"notification": "turn_end", "id_party": "round": "move_results": {'
+    b'"success": true, "position": {"row": "col": '
+    b'{"move": {"next_position": {"row": 0, "col": 0}}'
+    b'{"status": "KO", "response": {"error": '
+    b'{"status": "OK", "response": {"visible_cells": "0000000000000000'
+)
+
+def new_compressor(level=6, use_zdict=True):
+    """
+    Créer le compresseur d'une connexion
+    Sans dictionnaire après une reprise par un nouveau processus : le client
+    continue avec son décompresseur, dont la fenêtre ne contient pas le
+    dictionnaire aux positions qu'un nouveau flux supposerait
+    """
+    if use_zdict:
+        return zlib.compressobj(level, zlib.DEFLATED, -15, zdict=COMPRESSION_ZDICT)
+    return zlib.compressobj(level, zlib.DEFLATED, -15)
+
+def compressed_frame(compressor, payload, threshold):
+    """Préfixer une trame par sa longueur, en la compressant si elle atteint le seuil"""
+    if len(payload) < threshold:
+        return LENGTH.pack(len(payload)) + payload
+    
+    data = compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return LENGTH.pack(len(data) | COMPRESSED_FLAG) + data
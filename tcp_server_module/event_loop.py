@@ -0,0 +1,136 @@
+import selectors
+import socket
+import threading
+import logging
+from collections import deque
+
+class EventLoop:
+    """
+    Boucle d'événements mono-thread basée sur selectors
+    Un seul réacteur possède tous les sockets enregistrés et appelle
+    le callback associé quand un socket devient prêt
+    """
+    
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.running = False
+        self.logger = logging.getLogger("EventLoop")
+        self._thread_id = None
+        self._pending = deque()  # callbacks soumis depuis d'autres threads
+        self._pending_lock = threading.Lock()
+        
+        # Paire de sockets pour réveiller le select depuis un autre thread
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self.selector.register(self._wakeup_recv, selectors.EVENT_READ, self._drain_wakeup)
+    
+    def in_loop_thread(self):
+        """Vérifier si l'appel est fait depuis le thread de la boucle"""
+        return self._thread_id == threading.get_ident()
+    
+    def register(self, sock, events, callback):
+        """Enregistrer un socket avec le callback appelé quand il est prêt"""
+        if not self.in_loop_thread() and self.running:
+            self.call_soon_threadsafe(self.register, sock, events, callback)
+            return
+        self.selector.register(sock, events, callback)
+    
+    def modify(self, sock, events, callback):
+        """Modifier les événements surveillés pour un socket"""
+        if not self.in_loop_thread() and self.running:
+            self.call_soon_threadsafe(self.modify, sock, events, callback)
+            return
+        try:
+            self.selector.modify(sock, events, callback)
+        except (KeyError, ValueError):
+            pass
+    
+    def unregister(self, sock):
+        """Retirer un socket de la boucle"""
+        if not self.in_loop_thread() and self.running:
+            self.call_soon_threadsafe(self.unregister, sock)
+            return
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+    
+    def call_soon_threadsafe(self, callback, *args):
+        """Planifier l'exécution d'un callback dans le thread de la boucle"""
+        with self._pending_lock:
+            self._pending.append((callback, args))
+        try:
+            self._wakeup_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            # Le buffer de réveil est plein : la boucle est déjà réveillée
+            pass
+    
+    def _drain_wakeup(self, mask):
+        """Vider le socket de réveil"""
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+    
+    def _run_pending(self):
+        """Exécuter les callbacks soumis depuis d'autres threads"""
+        while True:
+            with self._pending_lock:
+                if not self._pending:
+                    return
+                callback, args = self._pending.popleft()
+            try:
+                callback(*args)
+            except Exception as e:
+                self.logger.error(f"Erreur dans un callback planifié: {e}")
+    
+    def run(self, timeout=1.0, on_tick=None):
+        """
+        Exécuter la boucle jusqu'à l'appel de stop()
+        on_tick est appelé après chaque itération (au moins toutes les timeout secondes)
+        """
+        self._thread_id = threading.get_ident()
+        self.running = True
+        
+        try:
+            while self.running:
+                events = self.selector.select(timeout)
+                for key, mask in events:
+                    callback = key.data
+                    try:
+                        callback(mask)
+                    except Exception as e:
+                        self.logger.error(f"Erreur dans le callback de {key.fileobj}: {e}")
+                
+                self._run_pending()
+                
+                if on_tick is not None:
+                    try:
+                        on_tick()
+                    except Exception as e:
+                        self.logger.error(f"Erreur dans le callback périodique: {e}")
+        finally:
+            self.running = False
+            self._thread_id = None
+    
+    def stop(self):
+        """Demander l'arrêt de la boucle"""
+        self.running = False
+        try:
+            self._wakeup_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass
+    
+    def close(self):
+        """Libérer les ressources de la boucle"""
+        try:
+            self.selector.close()
+        except Exception:
+            pass
+        for sock in (self._wakeup_recv, self._wakeup_send):
+            try:
+                sock.close()
+            except Exception:
+                pass
@@ -0,0 +1,106 @@
+"""
+Transfert des sockets d'un serveur en cours d'exécution vers un nouveau
+processus (redémarrage sans coupure)
+
+Le serveur lancé avec handoff_socket_path écoute sur ce socket Unix
+(SOCK_SEQPACKET). Un nouveau processus lancé avec takeover=True s'y connecte
+et envoie TAKEOVER ; l'ancien serveur arrête alors le moteur et les clients,
+puis envoie :
+    - un en-tête JSON {"fd_chunks": n, "state_chunks": m}
+    - n messages portant les descripteurs (SCM_RIGHTS) : socket d'écoute
+      puis sockets des clients, dans l'ordre de l'état
+    - m morceaux de l'état sérialisé (pickle : sessions des connexions,
+      sessions de reprise et parties du moteur)
+Le nouveau processus répond OK une fois tout reçu, et l'ancien s'arrête sans
+fermer les connexions (le noyau ne les ferme qu'au dernier descripteur)
+"""
+
+import json
+import os
+import pickle
+import socket
+
+TAKEOVER_REQUEST = b"TAKEOVER"
+TAKEOVER_ACK = b"OK"
+
+# Descripteurs par message (le noyau en accepte au plus 253 par SCM_RIGHTS)
+FDS_PER_MESSAGE = 200
+# Taille des morceaux de l'état sérialisé
+STATE_CHUNK_SIZE = 32 * 1024
+HEADER_SIZE = 4096
+
+HANDOFF_TIMEOUT = 10.0
+
+class HandoffError(Exception):
+    """Échec du transfert des sockets entre processus"""
+
+def open_handoff_listener(path):
+    """Créer le socket Unix sur lequel un nouveau processus peut demander le transfert"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    listener.bind(path)
+    os.chmod(path, 0o600)  # l'état transmis est désérialisé avec pickle
+    listener.listen(1)
+    listener.setblocking(False)
+    return listener
+
+def read_takeover_request(conn):
+    """Lire la demande du nouveau processus, retourne True si c'est bien une demande de transfert"""
+    conn.setblocking(True)
+    conn.settimeout(HANDOFF_TIMEOUT)
+    try:
+        return conn.recv(HEADER_SIZE) == TAKEOVER_REQUEST
+    except OSError:
+        return False
+
+def send_handoff(conn, sockets, state):
+    """Envoyer les sockets et l'état au nouveau processus, puis attendre son accusé de réception"""
+    fds = [sock.fileno() for sock in sockets]
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    fd_chunks = [fds[i:i + FDS_PER_MESSAGE] for i in range(0, len(fds), FDS_PER_MESSAGE)]
+    state_chunks = [payload[i:i + STATE_CHUNK_SIZE] for i in range(0, len(payload), STATE_CHUNK_SIZE)]
+    
+    try:
+        conn.sendall(json.dumps({"fd_chunks": len(fd_chunks), "state_chunks": len(state_chunks)}).encode('utf-8'))
+        for chunk in fd_chunks:
+            socket.send_fds(conn, [b"F"], chunk)
+        for chunk in state_chunks:
+            conn.sendall(chunk)
+        
+        if conn.recv(HEADER_SIZE) != TAKEOVER_ACK:
+            raise HandoffError("Le nouveau processus n'a pas confirmé le transfert")
+    except OSError as e:
+        raise HandoffError(f"Transfert interrompu: {e}")
+
+def request_takeover(path):
+    """
+    Demander au serveur qui écoute sur path de transférer ses sockets
+    Retourne un tuple (liste de sockets, état)
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    conn.settimeout(HANDOFF_TIMEOUT)
+    received = []
+    try:
+        conn.connect(path)
+        conn.sendall(TAKEOVER_REQUEST)
+        
+        header = json.loads(conn.recv(HEADER_SIZE).decode('utf-8'))
+        for _ in range(header["fd_chunks"]):
+            _, fds, _, _ = socket.recv_fds(conn, 1, FDS_PER_MESSAGE)
+            received.extend(fds)
+        payload = b"".join(conn.recv(STATE_CHUNK_SIZE) for _ in range(header["state_chunks"]))
+        state = pickle.loads(payload)
+        
+        conn.sendall(TAKEOVER_ACK)
+    except (OSError, ValueError, KeyError, pickle.UnpicklingError) as e:
+        for fd in received:
+            os.close(fd)
+        raise HandoffError(f"Transfert impossible depuis {path}: {e}")
+    finally:
+        conn.close()
+    
+    return [socket.socket(fileno=fd) for fd in received], state
@@ -0,0 +1,39 @@
+import json
+
+from . import binary_codec
+
+class EncodedNotification:
+    """
+    Notification sérialisée une seule fois par encodage
+    La même trame (bytes immuables) est partagée par les files d'envoi de
+    tous les destinataires au lieu d'être ré-encodée pour chacun
+    Chaque trame effectivement construite est comptée dans le compteur
+    "notifications_encoded" de stats
+    """
+    
+    def __init__(self, payload, stats=None):
+        self.payload = payload
+        self.stats = stats  # compteurs du serveur (ServerStats), ou None
+        self.coalesce_key = (payload.get("notification"), payload.get("id_party"))
+        self.frames = {}  # (encodage, préfixe de longueur) -> trame
+    
+    def frame_for(self, encoding, length_prefixed=False):
+        """
+        Trame de la notification pour l'encodage d'une connexion
+        length_prefixed : JSON préfixé par sa longueur (connexions avec compression)
+        """
+        key = (encoding, length_prefixed)
+        frame = self.frames.get(key)
+        if frame is None:
+            if encoding == "binary":
+                frame = binary_codec.encode_notification(self.payload)
+            elif length_prefixed:
+                frame = binary_codec.frame(json.dumps(self.payload).encode('utf-8'))
+            else:
+                frame = (json.dumps(self.payload) + '\n').encode('utf-8')
+            # Deux destinataires peuvent construire la même trame en parallèle : seule la première est gardée
+            kept = self.frames.setdefault(key, frame)
+            if kept is frame and self.stats is not None:
+                self.stats.increment("notifications_encoded")
+            frame = kept
+        return frame
@@ -0,0 +1,96 @@
+from collections import deque
+
+# Politiques appliquées aux notifications quand un client ne lit pas assez vite
+BACKPRESSURE_POLICIES = ("drop", "coalesce", "disconnect")
+
+# Résultats de OutboundQueue.push
+QUEUED = "queued"
+DROPPED = "dropped"
+COALESCED = "coalesced"
+OVERFLOW = "overflow"
+
+class OutboundQueue:
+    """
+    File d'envoi non bloquante d'une connexion
+    Les trames sont envoyées quand le socket est prêt en écriture ; au-delà
+    du seuil haut (high water mark), la politique décide du sort des
+    notifications : les ignorer, remplacer la notification en attente de
+    même clé, ou déconnecter le client
+    """
+    
+    def __init__(self, high_water_mark, policy="drop"):
+        self.high_water_mark = high_water_mark
+        self.policy = policy
+        self.frames = deque()  # entrées [données, clé de regroupement]
+        self.by_key = {}  # clé de regroupement -> entrée en attente
+        self.size = 0  # octets en attente d'envoi
+        self.offset = 0  # octets déjà envoyés de la première trame
+    
+    def __len__(self):
+        return len(self.frames)
+    
+    def push(self, data, coalesce_key=None, notification=False):
+        """
+        Ajouter une trame à la file
+        Retourne QUEUED, DROPPED, COALESCED ou OVERFLOW (client à déconnecter)
+        """
+        if self.size + len(data) > self.high_water_mark:
+            if self.policy == "disconnect":
+                return OVERFLOW
+            
+            if notification:
+                if self.policy == "coalesce" and self._replace(coalesce_key, data):
+                    return COALESCED
+                return DROPPED
+        
+        entry = [data, coalesce_key]
+        self.frames.append(entry)
+        self.size += len(data)
+        if coalesce_key is not None:
+            self.by_key[coalesce_key] = entry
+        return QUEUED
+    
+    def _replace(self, coalesce_key, data):
+        """Remplacer la trame en attente de même clé par une plus récente"""
+        entry = self.by_key.get(coalesce_key)
+        if entry is None:
+            return False
+        
+        # La première trame peut être partiellement envoyée : on ne la modifie plus
+        if self.offset and self.frames and self.frames[0] is entry:
+            return False
+        
+        self.size += len(data) - len(entry[0])
+        entry[0] = data
+        return True
+    
+    def pending_bytes(self):
+        """Données restant à envoyer, concaténées"""
+        if not self.frames:
+            return b""
+        return b"".join([self.frames[0][0][self.offset:]] + [entry[0] for entry in list(self.frames)[1:]])
+    
+    def flush(self, sock):
+        """
+        Envoyer autant de données que le socket en accepte sans bloquer
+        Retourne True si la file est vide
+        """
+        while self.frames:
+            entry = self.frames[0]
+            data = entry[0]
+            try:
+                with memoryview(data) as view:
+                    sent = sock.send(view[self.offset:])
+            except (BlockingIOError, InterruptedError):
+                return False
+            
+            self.offset += sent
+            self.size -= sent
+            if self.offset < len(data):
+                return False
+            
+            self.frames.popleft()
+            self.offset = 0
+            if entry[1] is not None and self.by_key.get(entry[1]) is entry:
+                del self.by_key[entry[1]]
+        return True
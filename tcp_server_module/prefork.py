@@ -0,0 +1,77 @@
+import os
+import time
+import signal
+import logging
+
+from .tcp_server import TcpServer
+
+class PreforkServer:
+    """
+    Superviseur du mode pré-fork
+    Lance N processus workers qui écoutent tous sur le même port (SO_REUSEPORT).
+    Chaque worker possède son propre moteur de jeu : ce processus ne doit donc
+    pas instancier GameEngine avant le fork
+    """
+    
+    def __init__(self, host='127.0.0.1', port=5001, config=None):
+        self.host = host
+        self.port = port
+        self.config = config
+        self.running = False
+        self.workers = {}  # pid -> index du worker
+        self.logger = logging.getLogger("PreforkServer")
+    
+    def start(self):
+        """Démarrer les workers et les relancer s'ils s'arrêtent"""
+        self.running = True
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+        
+        for worker_index in range(self.config.workers):
+            self._spawn_worker(worker_index)
+        
+        self.logger.info(f"{self.config.workers} workers démarrés sur {self.host}:{self.port}")
+        
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            
+            worker_index = self.workers.pop(pid, None)
+            if worker_index is not None and self.running:
+                # Les parties du worker sont perdues, mais son shard redevient joignable
+                self.logger.warning(f"Worker {worker_index} (pid {pid}) arrêté, redémarrage")
+                time.sleep(1)
+                self._spawn_worker(worker_index)
+        
+        self.logger.info("Serveur pré-fork arrêté")
+    
+    def _spawn_worker(self, worker_index):
+        """Lancer un processus worker"""
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                server = TcpServer(self.host, self.port, self.config, worker_index=worker_index)
+                signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                server.start()
+            except Exception as e:
+                self.logger.error(f"Erreur du worker {worker_index}: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        
+        self.workers[pid] = worker_index
+    
+    def stop(self):
+        """Arrêter tous les workers"""
+        self.running = False
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
@@ -2,20 +2,111 @@ import json
 import sys
 import os
 import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 # Ajouter le chemin parent pour pouvoir importer les modules frères
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from game_engine_module.game_engine import GameEngine
 
+@dataclass
+class Request:
+    """Requête client analysée une seule fois"""
+    action: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+# Encodages de messages et compressions négociables par connexion (action "negotiate")
+ENCODINGS = ("json", "binary")
+COMPRESSIONS = ("none", "deflate")
+
+# Nombre maximal de sous-requêtes dans une action "batch"
+MAX_BATCH_SIZE = 256
+
+# Actions d'un lot exécutées par le moteur avec une seule recherche de la partie
+BATCHED_ENGINE_ACTIONS = ("party_status", "gameboard_status", "move")
+
+# Actions qui modifient la connexion (joueur, encodage, session) : refusées dans un lot,
+# le résultat d'une sous-requête n'étant pas appliqué à la connexion
+CONNECTION_ACTIONS = ("subscribe", "resume", "negotiate")
+
+def build_request(message):
+    """Construire une Request à partir d'un message JSON déjà décodé"""
+    # Conversion de la liste des paramètres en dictionnaire
+    params_dict = {}
+    parameters = message.get('parameters', [])
+    if isinstance(parameters, list):
+        for param in parameters:
+            if isinstance(param, dict):
+                params_dict.update(param)
+    
+    return Request(message.get('action'), params_dict)
+
+@dataclass
+class ActionResult:
+    """
+    Résultat d'une action : réponse à envoyer au client et effets
+    sur la session (partie et joueur associés à la connexion)
+    """
+    status: str
+    response: Dict[str, Any]
+    game_id: Optional[int] = None
+    player_id: Optional[int] = None
+    encoding: Optional[str] = None
+    resume_token: Optional[str] = None
+    compression: Optional[str] = None
+    
+    @property
+    def ok(self):
+        return self.status == "OK"
+    
+    def to_dict(self):
+        """Corps de la réponse envoyée au client"""
+        return {
+            "status": self.status,
+            "response": self.response
+        }
+    
+    def to_json(self):
+        """Sérialiser la réponse (une seule fois par requête)"""
+        return json.dumps(self.to_dict())
+
+def action(name):
+    """Décorateur enregistrant une méthode de Protocol comme traitement d'une action"""
+    def decorator(handler):
+        handler._protocol_action = name
+        return handler
+    return decorator
+
 class Protocol:
     """
     Protocole de communication pour le serveur TCP
     Gère l'interprétation des messages JSON et les réponses à envoyer
     """
     
-    def __init__(self):
+    # Table de dispatch : nom de l'action -> fonction(protocol, params) retournant un ActionResult
+    actions = {}
+    
+    @classmethod
+    def _collect_actions(cls):
+        """Enregistrer les méthodes décorées avec @action"""
+        for attribute in vars(cls).values():
+            name = getattr(attribute, "_protocol_action", None)
+            if name is not None:
+                cls.actions[name] = attribute
+    
+    @classmethod
+    def register_action(cls, name, handler):
+        """
+        Ajouter (ou remplacer) le traitement d'une action
+        handler(protocol, params) doit retourner un ActionResult
+        """
+        cls.actions[name] = handler
+    
+    def __init__(self, sessions=None):
         self.game_engine = GameEngine.get_instance()
+        self.sessions = sessions  # SessionRegistry du serveur (jetons de reprise), optionnel
+        self.player = None  # (id_party, id_player) inscrit ou repris sur cette connexion
         self.logger = logging.getLogger("Protocol")
     
     def handle_message(self, message_str):
@@ -23,66 +114,107 @@ class Protocol:
         Traite un message JSON envoyé par le client
         Retourne une réponse JSON
         """
+        return self.process(message_str).to_json()
+    
+    def process(self, message_str):
+        """Analyser puis traiter un message, retourne un ActionResult"""
+        request, error = self.parse_request(message_str)
+        if error:
+            return error
+        return self.dispatch(request)
+    
+    def parse_request(self, message_str):
+        """
+        Analyser un message JSON
+        Retourne un tuple (Request, None) ou (None, ActionResult d'erreur)
+        """
         try:
             message = json.loads(message_str)
-            
-            if 'action' not in message:
-                return self._error_response("Champ 'action' manquant")
-                
-            action = message.get('action')
-            parameters = message.get('parameters', [])
-            
-            # Conversion de la liste des paramètres en dictionnaire
-            params_dict = {}
-            for param in parameters:
-                if isinstance(param, dict):
-                    params_dict.update(param)
-            
-            # Traitement des différentes actions
-            if action == "list":
-                return self._handle_list()
-            elif action == "subscribe":
-                return self._handle_subscribe(params_dict)
-            elif action == "party_status":
-                return self._handle_party_status(params_dict)
-            elif action == "gameboard_status":
-                return self._handle_gameboard_status(params_dict)
-            elif action == "move":
-                return self._handle_move(params_dict)
-            else:
-                return self._error_response(f"Action inconnue: {action}")
-                
         except json.JSONDecodeError:
-            return self._error_response("Format JSON invalide")
+            return None, self._error_response("Format JSON invalide")
+        
+        if not isinstance(message, dict):
+            return None, self._error_response("Format JSON invalide")
+        if 'action' not in message:
+            return None, self._error_response("Champ 'action' manquant")
+        
+        return build_request(message), None
+    
+    def dispatch(self, request):
+        """Exécuter l'action demandée via la table de dispatch"""
+        handler = self.actions.get(request.action)
+        if handler is None:
+            return self._error_response(f"Action inconnue: {request.action}")
+        
+        try:
+            return handler(self, request.params)
         except Exception as e:
             self.logger.error(f"Erreur lors du traitement du message: {e}")
             return self._error_response(f"Erreur serveur: {str(e)}")
     
-    def _success_response(self, response_data):
+    def _success_response(self, response_data, game_id=None, player_id=None):
         """Crée une réponse de succès avec les données fournies"""
-        response = {
-            "status": "OK",
-            "response": response_data
-        }
-        return json.dumps(response)
+        return ActionResult("OK", response_data, game_id, player_id)
     
     def _error_response(self, error_message):
         """Crée une réponse d'erreur avec le message fourni"""
-        response = {
-            "status": "KO",
-            "response": {
-                "error": error_message
-            }
-        }
-        return json.dumps(response)
+        return ActionResult("KO", {"error": error_message})
+    
+    def throttled_response(self, retry_after):
+        """Crée la réponse d'une requête refusée par la limitation du débit"""
+        retry_after = round(retry_after, 3)
+        return ActionResult("KO", {
+            "error": f"Trop de requêtes, réessayer dans {retry_after} s",
+            "retry_after": retry_after
+        })
+    
+    def _viewer(self, id_party):
+        """Joueur de la connexion dans la partie id_party (seul autorisé à voir sa vue), ou None"""
+        if self.player is not None and self.player[0] == id_party:
+            return self.player[1]
+        return None
+    
+    def _parse_party_player(self, params):
+        """
+        Valider les paramètres 'id_party' et 'id_player'
+        Retourne un tuple (id_party, id_player, None) ou (None, None, ActionResult d'erreur)
+        """
+        id_party = params.get("id_party")
+        id_player = params.get("id_player")
+        
+        if not id_party:
+            return None, None, self._error_response("Paramètre 'id_party' manquant")
+        if not id_player:
+            return None, None, self._error_response("Paramètre 'id_player' manquant")
+        
+        try:
+            return int(id_party), int(id_player), None
+        except (TypeError, ValueError):
+            return None, None, self._error_response("'id_party' et 'id_player' doivent être des entiers")
+    
+    def _parse_move(self, params):
+        """
+        Valider le paramètre 'move'
+        Retourne un tuple (move, None) ou (None, ActionResult d'erreur)
+        """
+        move = params.get("move")
+        
+        if not move:
+            return None, self._error_response("Paramètre 'move' manquant")
+        if not isinstance(move, str) or len(move) != 2 or not all(c in "01-" for c in move):
+            return None, self._error_response("Format de mouvement invalide. Doit être 2 caractères indiquant le vecteur déplacement")
+        
+        return move, None
     
-    def _handle_list(self):
+    @action("list")
+    def _handle_list(self, params):
         """Traite une requête de liste des parties disponibles"""
         parties_ouvertes = self.game_engine.get_open_games()
         return self._success_response({
             "id_parties": parties_ouvertes
         })
     
+    @action("subscribe")
     def _handle_subscribe(self, params):
         """Traite une demande d'inscription à une partie"""
         player_name = params.get("player")
@@ -101,77 +233,159 @@ class Protocol:
         result, error = self.game_engine.add_player_to_game(id_party, player_name)
         if error:
             return self._error_response(error)
+        
+        response = self._success_response(result, game_id=id_party, player_id=result["id_player"])
+        self.player = (id_party, result["id_player"])
+        
+        # Jeton permettant à une nouvelle connexion de reprendre la session sans se réinscrire
+        if self.sessions is not None and self.sessions.enabled:
+            response.resume_token = result["resume_token"] = self.sessions.create(id_party, result["id_player"])
             
-        return self._success_response(result)
+        return response
     
+    @action("party_status")
     def _handle_party_status(self, params):
         """Traite une demande de statut d'une partie"""
-        id_party = params.get("id_party")
-        id_player = params.get("id_player")
-        
-        if not id_party:
-            return self._error_response("Paramètre 'id_party' manquant")
-        if not id_player:
-            return self._error_response("Paramètre 'id_player' manquant")
-            
-        try:
-            id_party = int(id_party)
-            id_player = int(id_player)
-        except ValueError:
-            return self._error_response("'id_party' et 'id_player' doivent être des entiers")
+        id_party, id_player, error = self._parse_party_player(params)
+        if error:
+            return error
             
         result, error = self.game_engine.get_party_status(id_party, id_player)
         if error:
             return self._error_response(error)
             
-        return self._success_response({"party": result})
+        return self._success_response({"party": result}, game_id=id_party)
     
+    @action("gameboard_status")
     def _handle_gameboard_status(self, params):
         """Traite une demande de statut du plateau de jeu"""
-        id_party = params.get("id_party")
-        id_player = params.get("id_player")
-        
-        if not id_party:
-            return self._error_response("Paramètre 'id_party' manquant")
-        if not id_player:
-            return self._error_response("Paramètre 'id_player' manquant")
-            
-        try:
-            id_party = int(id_party)
-            id_player = int(id_player)
-        except ValueError:
-            return self._error_response("'id_party' et 'id_player' doivent être des entiers")
+        id_party, id_player, error = self._parse_party_player(params)
+        if error:
+            return error
             
-        result, error = self.game_engine.get_gameboard_status(id_party, id_player)
+        result, error = self.game_engine.get_gameboard_status(id_party, id_player, self._viewer(id_party))
         if error:
             return self._error_response(error)
             
-        return self._success_response(result)
+        return self._success_response(result, game_id=id_party)
     
+    @action("move")
     def _handle_move(self, params):
         """Traite une demande de déplacement"""
-        id_party = params.get("id_party")
-        id_player = params.get("id_player")
-        move = params.get("move")
+        id_party, id_player, error = self._parse_party_player(params)
+        if error:
+            return error
         
-        if not id_party:
-            return self._error_response("Paramètre 'id_party' manquant")
-        if not id_player:
-            return self._error_response("Paramètre 'id_player' manquant")
-        if not move:
-            return self._error_response("Paramètre 'move' manquant")
-            
-        try:
-            id_party = int(id_party)
-            id_player = int(id_player)
-        except ValueError:
-            return self._error_response("'id_party' et 'id_player' doivent être des entiers")
-            
-        if len(move) != 2 or not all(c in "01-" for c in move):
-            return self._error_response("Format de mouvement invalide. Doit être 2 caractères indiquant le vecteur déplacement")
+        move, error = self._parse_move(params)
+        if error:
+            return error
             
         result, error = self.game_engine.add_move(id_party, id_player, move)
         if error:
             return self._error_response(error)
             
-        return self._success_response(result)
\ No newline at end of file
+        return self._success_response(result, game_id=id_party)
+    
+    @action("resume")
+    def _handle_resume(self, params):
+        """Traite une demande de reprise de session après une reconnexion"""
+        token = params.get("resume_token")
+        
+        if not token:
+            return self._error_response("Paramètre 'resume_token' manquant")
+        
+        session = self.sessions.lookup(token) if self.sessions is not None else None
+        if session is None:
+            return self._error_response("Jeton de reprise inconnu ou expiré")
+        
+        response = self._success_response({
+            "id_party": session.id_party,
+            "id_player": session.id_player
+        }, game_id=session.id_party, player_id=session.id_player)
+        response.resume_token = token
+        self.player = (session.id_party, session.id_player)
+        return response
+    
+    @action("negotiate")
+    def _handle_negotiate(self, params):
+        """Traite une demande de changement d'encodage (et de compression) des messages de la connexion"""
+        encoding = params.get("encoding", "json")
+        compression = params.get("compression", "none")
+        
+        if encoding not in ENCODINGS:
+            return self._error_response(f"Encodage inconnu: {encoding}")
+        if compression not in COMPRESSIONS:
+            return self._error_response(f"Compression inconnue: {compression}")
+        
+        result = self._success_response({"encoding": encoding, "compression": compression})
+        result.encoding = encoding
+        result.compression = compression
+        return result
+
+    @action("batch")
+    def _handle_batch(self, params):
+        """
+        Traite un lot de sous-requêtes envoyées dans une seule trame
+        Les réponses sont retournées dans l'ordre des sous-requêtes ; les
+        actions sur une partie sont regroupées par partie et exécutées par le
+        moteur avec une seule recherche de la partie par lot. Les actions qui
+        modifient la connexion (CONNECTION_ACTIONS) doivent être envoyées seules
+        """
+        requests = params.get("requests")
+        
+        if not isinstance(requests, list):
+            return self._error_response("Paramètre 'requests' manquant ou invalide")
+        if len(requests) > MAX_BATCH_SIZE:
+            return self._error_response(f"Lot trop grand (maximum {MAX_BATCH_SIZE} requêtes)")
+        
+        results = [None] * len(requests)
+        operations = {}  # id_party -> [(index, action, id_player, move)]
+        
+        for index, message in enumerate(requests):
+            if not isinstance(message, dict) or 'action' not in message:
+                results[index] = self._error_response("Champ 'action' manquant")
+                continue
+            
+            request = build_request(message)
+            if request.action == "batch":
+                results[index] = self._error_response("Lots imbriqués non supportés")
+                continue
+            if request.action in CONNECTION_ACTIONS:
+                results[index] = self._error_response(f"Action '{request.action}' non supportée dans un lot")
+                continue
+            
+            if request.action not in BATCHED_ENGINE_ACTIONS:
+                results[index] = self.dispatch(request)
+                continue
+            
+            id_party, id_player, error = self._parse_party_player(request.params)
+            move = None
+            if error is None and request.action == "move":
+                move, error = self._parse_move(request.params)
+            if error:
+                results[index] = error
+                continue
+            
+            operations.setdefault(id_party, []).append((index, request.action, id_player, move))
+        
+        for id_party, party_operations in operations.items():
+            outcomes = self.game_engine.execute_batch(
+                id_party, [(action, id_player, move) for _, action, id_player, move in party_operations],
+                self._viewer(id_party))
+            for (index, action, _, _), (result, error) in zip(party_operations, outcomes):
+                if error:
+                    results[index] = self._error_response(error)
+                elif action == "party_status":
+                    results[index] = self._success_response({"party": result})
+                else:
+                    results[index] = self._success_response(result)
+        
+        # La connexion n'est associée à une partie que si le lot n'en vise qu'une
+        game_ids = {result.game_id for result in results if result.game_id is not None}
+        game_ids.update(operations)
+        game_id = game_ids.pop() if len(game_ids) == 1 else None
+        
+        return self._success_response({"responses": [result.to_dict() for result in results]}, game_id=game_id)
+
+# Construire la table de dispatch à partir des méthodes décorées
+Protocol._collect_actions()
\ No newline at end of file
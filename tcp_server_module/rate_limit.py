@@ -0,0 +1,139 @@
+import threading
+import time
+
+from .protocol import build_request
+
+# Coût par défaut des actions en jetons : lire le plateau coûte plus cher qu'un déplacement
+DEFAULT_ACTION_COSTS = {
+    "list": 2.0,
+    "subscribe": 2.0,
+    "party_status": 1.0,
+    "gameboard_status": 4.0,
+    "move": 1.0,
+    "negotiate": 1.0,
+}
+
+# Au-delà de ce nombre de seaux par joueur, les seaux pleins (joueurs inactifs) sont oubliés
+MAX_PLAYER_BUCKETS = 10000
+
+class TokenBucket:
+    """
+    Seau à jetons : rate jetons par seconde, au plus capacity en réserve
+    Une requête plus chère que la capacité est acceptée quand le seau est plein
+    et laisse une dette que les requêtes suivantes attendent de rembourser
+    """
+    
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+    
+    def _refill(self):
+        """Ajouter les jetons accumulés depuis la dernière mise à jour"""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, cost):
+        """Secondes à attendre avant de pouvoir dépenser cost jetons (0 si possible maintenant)"""
+        self._refill()
+        missing = min(cost, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+    
+    def take(self, cost):
+        """Dépenser cost jetons (après vérification avec wait_time)"""
+        self.tokens -= cost
+    
+    def is_full(self):
+        """Vérifier si le seau est plein (aucune requête récente)"""
+        self._refill()
+        return self.tokens >= self.capacity
+
+class RateLimiter:
+    """
+    Limitation du débit des requêtes avant leur exécution
+    Chaque connexion a son seau, et chaque joueur (id_party, id_player) a un
+    seau partagé par toutes ses connexions ; une requête n'est acceptée que si
+    tous les seaux concernés ont assez de jetons. Seules les requêtes d'une
+    connexion pour son propre joueur (inscrit ou repris sur cette connexion)
+    sont débitées au seau du joueur : une autre connexion ne peut pas le vider
+    """
+    
+    def __init__(self, config, clock=time.monotonic):
+        self.config = config
+        self.clock = clock
+        self.player_buckets = {}  # (id_party, id_player) -> TokenBucket
+        self.lock = threading.Lock()
+    
+    def connection_bucket(self):
+        """Créer le seau d'une nouvelle connexion (None si la limite est désactivée)"""
+        if not self.config.connection_rate:
+            return None
+        return TokenBucket(self.config.connection_rate, self.config.connection_burst, self.clock)
+    
+    def cost_of(self, action):
+        """Coût en jetons d'une action"""
+        return self.config.action_costs.get(action, self.config.default_action_cost)
+    
+    def charges(self, request, player=None):
+        """
+        Coût d'une requête : tuple (coût total, coût pour le joueur de la connexion)
+        player est le (id_party, id_player) de la connexion, ou None
+        Un lot coûte la somme de ses sous-requêtes
+        """
+        if request.action == "batch":
+            messages = request.params.get("requests")
+            requests = [build_request(message) for message in messages
+                        if isinstance(message, dict)] if isinstance(messages, list) else []
+        else:
+            requests = [request]
+        
+        total = 0.0
+        player_cost = 0.0
+        for sub_request in requests:
+            cost = self.cost_of(sub_request.action)
+            total += cost
+            if player is not None and _player_key(sub_request.params) == player:
+                player_cost += cost
+        return total, player_cost
+    
+    def check(self, connection_bucket, request, player=None):
+        """
+        Débiter les seaux concernés par la requête
+        player : (id_party, id_player) inscrit ou repris sur la connexion, ou None
+        Retourne 0 si la requête est acceptée, sinon le délai (secondes) avant de réessayer
+        """
+        total, player_cost = self.charges(request, player)
+        
+        with self.lock:
+            buckets = [(connection_bucket, total)] if connection_bucket is not None else []
+            if self.config.player_rate and player_cost:
+                buckets.append((self._player_bucket(player), player_cost))
+            
+            # Tout ou rien : aucun seau n'est débité si l'un d'eux est vide
+            retry_after = max((bucket.wait_time(cost) for bucket, cost in buckets), default=0.0)
+            if retry_after:
+                return retry_after
+            
+            for bucket, cost in buckets:
+                bucket.take(cost)
+        return 0.0
+    
+    def _player_bucket(self, player):
+        """Seau d'un joueur (verrou déjà pris)"""
+        bucket = self.player_buckets.get(player)
+        if bucket is None:
+            if len(self.player_buckets) >= MAX_PLAYER_BUCKETS:
+                self.player_buckets = {key: value for key, value in self.player_buckets.items()
+                                       if not value.is_full()}
+            bucket = self.player_buckets[player] = TokenBucket(self.config.player_rate, self.config.player_burst, self.clock)
+        return bucket
+
+def _player_key(params):
+    """Clé (id_party, id_player) d'une requête, ou None"""
+    try:
+        return int(params["id_party"]), int(params["id_player"])
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,148 @@
+import sys
+import os
+import tempfile
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Optional, Tuple
+
+# Ajouter le chemin parent pour pouvoir importer les modules frères
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from communication_module.framing import DEFAULT_MAX_FRAME_SIZE
+from .outbound import BACKPRESSURE_POLICIES
+from .rate_limit import DEFAULT_ACTION_COSTS
+
+# Modes de service disponibles pour le serveur TCP
+SERVING_MODES = ("threaded", "reactor")
+
+@dataclass
+class ServerConfig:
+    """Configuration du serveur TCP de jeu"""
+    # "threaded" : un thread par client (mode historique)
+    # "reactor" : une seule boucle d'événements (selectors) pour tous les clients
+    mode: str = "threaded"
+    
+    # Mode pré-fork : nombre de processus workers partageant le port (SO_REUSEPORT)
+    workers: int = 1
+    # Répertoire des sockets Unix utilisés pour transférer les requêtes entre workers
+    shard_socket_dir: str = field(default_factory=tempfile.gettempdir)
+    
+    # Taille maximale d'un message reçu (en octets)
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE
+    
+    # Octets en attente d'envoi au-delà desquels un client est considéré comme en retard
+    outbound_high_water_mark: int = 1024 * 1024
+    # "drop" : ignorer les notifications, "coalesce" : ne garder que la plus récente
+    # de chaque type par partie, "disconnect" : déconnecter le client
+    backpressure_policy: str = "drop"
+    
+    # File d'attente du noyau pour les connexions pas encore acceptées (listen)
+    listen_backlog: int = 1024
+    # Connexions acceptées au plus par réveil du socket d'écoute avant de rendre la main
+    accept_batch_size: int = 64
+    
+    # Redémarrage sans coupure : socket Unix sur lequel un nouveau processus peut
+    # demander le socket d'écoute et les connexions (SCM_RIGHTS)
+    handoff_socket_path: Optional[str] = None
+    # Démarrer en reprenant les connexions du serveur qui écoute sur handoff_socket_path
+    takeover: bool = False
+    
+    # Nombre maximal de connexions clients simultanées (0 : pas de limite)
+    max_connections: int = 10000
+    # Délais en secondes (0 : désactivé) : premier message après la connexion,
+    # inactivité entre deux messages (hors connexions associées à une partie),
+    # et message commencé mais jamais terminé
+    handshake_timeout: float = 10.0
+    idle_timeout: float = 300.0
+    slow_sender_timeout: float = 30.0
+    # Roue de temporisation : durée d'un tick (secondes) et nombre de cases
+    timer_resolution: float = 0.5
+    timer_slots: int = 512
+    
+    # Compression négociée ("deflate") : taille minimale (octets) d'une réponse
+    # compressée et niveau de zlib
+    compression_threshold: int = 1024
+    compression_level: int = 6
+    
+    # Durée de vie (secondes) d'une session de joueur sans connexion, pendant laquelle
+    # son jeton de reprise reste valable (0 : pas de jetons de reprise)
+    session_ttl: float = 600.0
+    # Notifications conservées par joueur déconnecté, renvoyées à la reprise
+    session_backlog_size: int = 64
+    
+    # Limitation du débit (seaux à jetons) : jetons par seconde et réserve maximale,
+    # par connexion et par joueur (0 : pas de limite)
+    connection_rate: float = 50.0
+    connection_burst: float = 100.0
+    player_rate: float = 20.0
+    player_burst: float = 40.0
+    # Coût en jetons de chaque action (les actions absentes coûtent default_action_cost)
+    action_costs: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_ACTION_COSTS))
+    default_action_cost: float = 1.0
+    
+    def validate(self) -> Tuple[bool, str]:
+        """
+        Valide la configuration du serveur
+        Retourne un tuple (valide, message d'erreur)
+        """
+        if self.mode not in SERVING_MODES:
+            return False, f"Mode de service inconnu: {self.mode}"
+        
+        if self.workers < 1:
+            return False, "Le nombre de workers doit être positif"
+        
+        if self.max_frame_size <= 0:
+            return False, "La taille maximale des messages doit être positive"
+        
+        if self.outbound_high_water_mark <= 0:
+            return False, "Le seuil de la file d'envoi doit être positif"
+        
+        if self.backpressure_policy not in BACKPRESSURE_POLICIES:
+            return False, f"Politique de contre-pression inconnue: {self.backpressure_policy}"
+        
+        if self.listen_backlog <= 0:
+            return False, "La file d'attente des connexions doit être positive"
+        
+        if self.accept_batch_size <= 0:
+            return False, "Le nombre de connexions acceptées par réveil doit être positif"
+        
+        if self.takeover and not self.handoff_socket_path:
+            return False, "La reprise des connexions nécessite handoff_socket_path"
+        
+        if self.handoff_socket_path and self.workers > 1:
+            return False, "Le transfert des connexions n'est pas supporté en mode pré-fork"
+        
+        if self.max_connections < 0:
+            return False, "Le nombre maximal de connexions ne peut pas être négatif"
+        
+        if min(self.handshake_timeout, self.idle_timeout, self.slow_sender_timeout) < 0:
+            return False, "Les délais d'expiration ne peuvent pas être négatifs"
+        
+        if self.timer_resolution <= 0 or self.timer_slots <= 0:
+            return False, "La résolution et le nombre de cases de la roue doivent être positifs"
+        
+        if self.compression_threshold < 0:
+            return False, "Le seuil de compression ne peut pas être négatif"
+        
+        if not 0 <= self.compression_level <= 9:
+            return False, "Le niveau de compression doit être compris entre 0 et 9"
+        
+        if self.session_ttl < 0:
+            return False, "La durée de vie des sessions ne peut pas être négative"
+        
+        if self.session_backlog_size < 0:
+            return False, "La taille de l'historique des notifications ne peut pas être négative"
+        
+        if min(self.connection_rate, self.player_rate) < 0:
+            return False, "Les débits autorisés ne peuvent pas être négatifs"
+        
+        if (self.connection_rate and self.connection_burst <= 0) or (self.player_rate and self.player_burst <= 0):
+            return False, "La réserve de jetons doit être positive"
+        
+        if self.default_action_cost < 0 or any(cost < 0 for cost in self.action_costs.values()):
+            return False, "Le coût d'une action ne peut pas être négatif"
+        
+        return True, ""
+    
+    def to_dict(self) -> Dict:
+        """Convertit l'objet en dictionnaire"""
+        return asdict(self)
@@ -0,0 +1,145 @@
+import secrets
+import threading
+from collections import deque
+
+from .notification import EncodedNotification
+
+TIMER_SESSION = "session"
+
+class Session:
+    """
+    Session d'un joueur, survivant à sa connexion TCP
+    Tant qu'aucune connexion n'y est rattachée, les notifications de la partie
+    sont conservées (au plus backlog_size) pour être renvoyées à la reprise
+    """
+    
+    def __init__(self, registry, token, id_party, id_player, backlog_size):
+        self.registry = registry
+        self.token = token
+        self.id_party = id_party
+        self.id_player = id_player
+        self.client_handler = None  # connexion rattachée, None si le joueur est déconnecté
+        self.backlog = deque(maxlen=backlog_size)  # EncodedNotification manquées
+    
+    def on_timeout(self, kind):
+        """Appelé par la roue de temporisation quand la session a expiré"""
+        self.registry.expire(self)
+
+class SessionRegistry:
+    """
+    Jetons de reprise des joueurs
+    subscribe crée une session dont le jeton permet à une nouvelle connexion de
+    se rattacher au joueur et à la partie en une seule requête ("resume")
+    """
+    
+    def __init__(self, timers, ttl, backlog_size, stats=None):
+        self.timers = timers  # roue de temporisation du serveur
+        self.stats = stats  # compteurs du serveur, pour les notifications recréées
+        self.ttl = ttl  # durée de vie d'une session sans connexion (secondes)
+        self.backlog_size = backlog_size
+        self.sessions = {}  # jeton -> Session
+        self.detached = {}  # id_party -> set de Session sans connexion
+        self.lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return self.ttl > 0
+    
+    def create(self, id_party, id_player):
+        """Créer la session d'un joueur qui vient de s'inscrire, retourne son jeton"""
+        # La partie est encodée dans le jeton pour qu'il puisse être routé vers son worker
+        token = f"{id_party}-{secrets.token_urlsafe(16)}"
+        with self.lock:
+            session = Session(self, token, id_party, id_player, self.backlog_size)
+            self.sessions[token] = session
+            self._detach(session)
+        return token
+    
+    def attach(self, token, client_handler):
+        """
+        Rattacher une connexion à la session d'un jeton
+        Retourne la session et la liste des notifications manquées, ou (None, [])
+        """
+        with self.lock:
+            session = self.sessions.get(token)
+            if session is None:
+                return None, []
+            
+            # Une reprise depuis une nouvelle connexion remplace l'ancienne
+            previous = session.client_handler
+            if previous is not None and previous is not client_handler:
+                previous.session = None
+            
+            session.client_handler = client_handler
+            detached = self.detached.get(session.id_party)
+            if detached is not None:
+                detached.discard(session)
+                if not detached:
+                    del self.detached[session.id_party]
+            missed = list(session.backlog)
+            session.backlog.clear()
+        
+        self.timers.cancel((session, TIMER_SESSION))
+        return session, missed
+    
+    def detach(self, session, client_handler):
+        """Détacher une connexion fermée de sa session"""
+        with self.lock:
+            if session.client_handler is not client_handler or session.token not in self.sessions:
+                return
+            self._detach(session)
+    
+    def _detach(self, session):
+        """Marquer une session comme sans connexion (verrou déjà pris)"""
+        session.client_handler = None
+        self.detached.setdefault(session.id_party, set()).add(session)
+        self.timers.schedule((session, TIMER_SESSION), self.ttl)
+    
+    def lookup(self, token):
+        """Session d'un jeton, ou None"""
+        with self.lock:
+            return self.sessions.get(token)
+    
+    def record(self, id_party, notification):
+        """Conserver une notification pour les joueurs de la partie actuellement déconnectés"""
+        with self.lock:
+            for session in self.detached.get(id_party, ()):
+                session.backlog.append(notification)
+    
+    def export_state(self):
+        """Sessions à transmettre au processus qui reprend le serveur"""
+        with self.lock:
+            return [{
+                "token": session.token,
+                "id_party": session.id_party,
+                "id_player": session.id_player,
+                "backlog": [notification.payload for notification in session.backlog]
+            } for session in self.sessions.values()]
+    
+    def import_state(self, sessions):
+        """Recréer les sessions transmises par le processus précédent (toutes détachées)"""
+        with self.lock:
+            for state in sessions:
+                session = Session(self, state["token"], state["id_party"], state["id_player"], self.backlog_size)
+                session.backlog.extend(EncodedNotification(payload, self.stats) for payload in state["backlog"])
+                self.sessions[session.token] = session
+                self._detach(session)
+    
+    def expire(self, session):
+        """Oublier une session restée trop longtemps sans connexion"""
+        with self.lock:
+            if session.client_handler is not None or self.sessions.get(session.token) is not session:
+                return
+            del self.sessions[session.token]
+            detached = self.detached.get(session.id_party)
+            if detached is not None:
+                detached.discard(session)
+                if not detached:
+                    del self.detached[session.id_party]
+
+def party_of_token(token):
+    """Partie encodée dans un jeton de reprise, ou None"""
+    try:
+        return int(str(token).split("-", 1)[0])
+    except ValueError:
+        return None
@@ -0,0 +1,280 @@
+import os
+import json
+import socket
+import select
+import selectors
+import threading
+import logging
+
+from collections import deque
+
+from communication_module.framing import LineFramer
+from .protocol import ActionResult
+from .sessions import party_of_token
+
+def shard_socket_path(socket_dir, port, worker_index):
+    """Chemin du socket Unix de transfert d'un worker"""
+    return os.path.join(socket_dir, f"tcpserver-{port}-{worker_index}.sock")
+
+class UpstreamConnection:
+    """
+    Connexion d'un client vers le worker propriétaire d'une partie
+    Les requêtes du client sont transmises telles quelles et chaque ligne
+    reçue du worker (réponses et notifications) est renvoyée au client
+    """
+    
+    def __init__(self, handler, path):
+        self.handler = handler
+        self.path = path
+        # Les lignes viennent d'un autre worker : pas de limite de taille
+        self.framer = LineFramer(max_frame_size=None)
+        # Opcodes binaires des requêtes transmises, dans l'ordre d'arrivée des réponses
+        self.pending_opcodes = deque()
+        self.outgoing = bytearray()  # données pas encore acceptées par le socket (mode réacteur)
+        self.closed = False
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(f"Upstream-{path}")
+        
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        
+        # En mode réacteur le socket est non bloquant et lu/écrit par la boucle :
+        # un worker ne doit jamais attendre la boucle d'un autre worker.
+        # Sinon la lecture est faite par un thread dédié
+        if handler.event_loop is not None:
+            self.sock.setblocking(False)
+            self.sock.connect(path)  # BlockingIOError si la file d'attente du worker est pleine
+            handler.event_loop.register(self.sock, selectors.EVENT_READ, self.on_ready)
+        else:
+            self.sock.connect(path)
+            reader_thread = threading.Thread(target=self._read_loop)
+            reader_thread.daemon = True
+            reader_thread.start()
+    
+    def send(self, message, opcode=None):
+        """Transmettre une ligne au worker propriétaire"""
+        with self.lock:
+            if not message.endswith('\n'):
+                message += '\n'
+            self.pending_opcodes.append(opcode)
+            if self.handler.event_loop is None:
+                self.sock.sendall(message.encode('utf-8'))
+                return
+            self.outgoing += message.encode('utf-8')
+            self._flush()
+    
+    def _flush(self):
+        """Envoyer ce que le socket accepte sans bloquer, surveiller l'écriture s'il reste des données"""
+        try:
+            sent = self.sock.send(self.outgoing)
+            del self.outgoing[:sent]
+        except BlockingIOError:
+            pass
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if self.outgoing else 0)
+        self.handler.event_loop.modify(self.sock, events, self.on_ready)
+    
+    def _read_loop(self):
+        """Lire les réponses du worker (mode un thread par client)"""
+        try:
+            while not self.closed:
+                readable, _, _ = select.select([self.sock], [], [], 1.0)
+                if self.sock in readable and not self._read_available():
+                    break
+        except Exception as e:
+            self.logger.error(f"Erreur sur la connexion de transfert: {e}")
+        finally:
+            self.close()
+    
+    def on_ready(self, mask):
+        """Appelé par la boucle d'événements quand le socket est lisible ou inscriptible"""
+        try:
+            if mask & selectors.EVENT_WRITE:
+                with self.lock:
+                    self._flush()
+            if mask & selectors.EVENT_READ and not self._read_available():
+                self.close()
+        except Exception as e:
+            self.logger.error(f"Erreur sur la connexion de transfert: {e}")
+            self.close()
+    
+    def _read_available(self):
+        """Relayer au client les lignes complètes reçues du worker"""
+        try:
+            received = self.framer.recv_from(self.sock)
+        except BlockingIOError:
+            return True
+        
+        if not received:
+            return False
+        
+        for frame in self.framer.frames():
+            if frame:
+                self._relay(frame.decode('utf-8'))
+        return True
+    
+    def _relay(self, line):
+        """Renvoyer au client une ligne du worker, dans l'encodage du client"""
+        message = json.loads(line)
+        if "notification" in message:
+            self.handler.send_notification(message)
+            return
+        
+        opcode = self.pending_opcodes.popleft() if self.pending_opcodes else None
+        if self.handler.encoding == "json":
+            self.handler.send_message(line)
+        else:
+            self.handler.send_result(ActionResult(message["status"], message["response"]), opcode)
+    
+    def close(self):
+        """Fermer la connexion de transfert"""
+        if self.closed:
+            return
+        self.closed = True
+        
+        if self.handler.event_loop is not None:
+            self.handler.event_loop.unregister(self.sock)
+        try:
+            self.sock.close()
+        except:
+            pass
+        self.handler.upstreams.pop(self.path, None)
+
+class ShardRouter:
+    """
+    Répartition des parties entre les workers du mode pré-fork
+    Une partie appartient au worker (id_party - 1) % nombre de workers ;
+    les requêtes visant une partie d'un autre worker lui sont transmises
+    via son socket Unix
+    """
+    
+    def __init__(self, worker_index, worker_count, port, socket_dir):
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.port = port
+        self.socket_dir = socket_dir
+        self.listener = None
+        self.logger = logging.getLogger(f"ShardRouter-{worker_index}")
+    
+    def owner_of(self, id_party):
+        """Index du worker propriétaire d'une partie"""
+        return (id_party - 1) % self.worker_count
+    
+    def is_local(self, id_party):
+        """Vérifier si la partie appartient à ce worker"""
+        return self.owner_of(id_party) == self.worker_index
+    
+    def open_listener(self):
+        """Créer le socket Unix recevant les requêtes transmises par les autres workers"""
+        path = shard_socket_path(self.socket_dir, self.port, self.worker_index)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        self.listener.listen(128)
+        self.listener.setblocking(False)
+        return self.listener
+    
+    def close(self):
+        """Fermer et supprimer le socket Unix de transfert"""
+        if self.listener is None:
+            return
+        try:
+            self.listener.close()
+        except:
+            pass
+        try:
+            os.unlink(shard_socket_path(self.socket_dir, self.port, self.worker_index))
+        except OSError:
+            pass
+        self.listener = None
+    
+    def route(self, handler, request, message, opcode=None):
+        """
+        Transmettre le message au worker propriétaire si nécessaire
+        Retourne True si le message a été pris en charge par le routeur
+        """
+        if request.action == 'list':
+            if handler.event_loop is None:
+                handler.send_result(self._gather_open_games(handler, message), opcode)
+            else:
+                # L'échange avec les autres workers est bloquant : hors de la boucle d'événements
+                gather_thread = threading.Thread(target=self._gather_in_background, args=(handler, message, opcode))
+                gather_thread.daemon = True
+                gather_thread.start()
+            return True
+        
+        id_party = self._target_party(request)
+        if id_party is None or self.is_local(id_party):
+            return False
+        
+        self._upstream_for(handler, self.owner_of(id_party)).send(message, opcode)
+        return True
+    
+    def _target_party(self, request):
+        """
+        Partie visée par une requête, ou None
+        Un lot est transmis en entier quand toutes ses sous-requêtes visent la même partie
+        """
+        if request.action == 'resume':
+            # Le jeton de reprise contient la partie, donc le worker qui possède la session
+            return party_of_token(request.params.get('resume_token'))
+        
+        if request.action != 'batch':
+            try:
+                return int(request.params.get('id_party'))
+            except (TypeError, ValueError):
+                return None
+        
+        requests = request.params.get('requests')
+        if not isinstance(requests, list):
+            return None
+        
+        id_parties = set()
+        for message in requests:
+            if not isinstance(message, dict):
+                return None
+            for param in message.get('parameters') or []:
+                if isinstance(param, dict) and 'id_party' in param:
+                    try:
+                        id_parties.add(int(param['id_party']))
+                    except (TypeError, ValueError):
+                        return None
+        return id_parties.pop() if len(id_parties) == 1 else None
+    
+    def _upstream_for(self, handler, worker_index):
+        """Récupérer (ou ouvrir) la connexion du client vers un worker"""
+        path = shard_socket_path(self.socket_dir, self.port, worker_index)
+        upstream = handler.upstreams.get(path)
+        if upstream is None or upstream.closed:
+            upstream = UpstreamConnection(handler, path)
+            handler.upstreams[path] = upstream
+        return upstream
+    
+    def _gather_in_background(self, handler, message, opcode):
+        """Rassembler la liste des parties puis la répondre depuis la boucle d'événements du client"""
+        result = self._gather_open_games(handler, message)
+        handler.event_loop.call_soon_threadsafe(handler.send_result, result, opcode)
+    
+    def _gather_open_games(self, handler, message):
+        """Fusionner la liste des parties ouvertes de tous les workers"""
+        id_parties = list(handler.protocol.game_engine.get_open_games())
+        
+        for worker_index in range(self.worker_count):
+            if worker_index == self.worker_index:
+                continue
+            path = shard_socket_path(self.socket_dir, self.port, worker_index)
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as peer:
+                    peer.settimeout(0.5)
+                    peer.connect(path)
+                    peer.sendall((message + '\n').encode('utf-8'))
+                    response = peer.makefile('r', encoding='utf-8').readline()
+                response_json = json.loads(response)
+                if response_json.get('status') == 'OK':
+                    id_parties.extend(response_json['response'].get('id_parties', []))
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Worker {worker_index} injoignable pour 'list': {e}")
+        
+        return ActionResult("OK", {"id_parties": sorted(id_parties)})
@@ -0,0 +1,23 @@
+import threading
+
+class ServerStats:
+    """Compteurs du serveur TCP, partagés entre les threads"""
+    
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+    
+    def increment(self, name, count=1):
+        """Incrémenter un compteur"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + count
+    
+    def get(self, name):
+        """Valeur actuelle d'un compteur"""
+        with self._lock:
+            return self._counters.get(name, 0)
+    
+    def snapshot(self):
+        """Copie de tous les compteurs"""
+        with self._lock:
+            return dict(self._counters)
@@ -6,6 +6,8 @@ import os
 import select
 import time
 import logging
+import argparse
+import selectors
 
 # Ajouter le chemin parent pour pouvoir importer les modules frères
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,6 +15,36 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from game_engine_module.game_engine import GameEngine
 from .client_handler import ClientHandler
 from .protocol import Protocol
+from .event_loop import EventLoop
+from .server_config import ServerConfig, SERVING_MODES
+from .sharding import ShardRouter
+from .stats import ServerStats
+from .notification import EncodedNotification
+from .outbound import BACKPRESSURE_POLICIES
+from .timer_wheel import TimerWheel
+from .rate_limit import RateLimiter
+from .sessions import SessionRegistry
+from .handoff import open_handoff_listener, read_takeover_request, send_handoff, request_takeover, HandoffError
+
+def read_listen_overflows():
+    """
+    Compteurs du noyau Linux sur les connexions perdues faute de place dans la
+    file d'attente de listen (tous sockets confondus), vide hors de Linux
+    """
+    try:
+        with open("/proc/net/netstat") as netstat:
+            lines = netstat.read().splitlines()
+    except OSError:
+        return {}
+    
+    for header, values in zip(lines[::2], lines[1::2]):
+        if header.startswith("TcpExt:"):
+            counters = dict(zip(header.split()[1:], values.split()[1:]))
+            return {
+                "listen_overflows": int(counters.get("ListenOverflows", 0)),
+                "listen_drops": int(counters.get("ListenDrops", 0))
+            }
+    return {}
 
 # Configuration du logger
 logging.basicConfig(
@@ -23,14 +55,40 @@ logging.basicConfig(
 class TcpServer:
     """Serveur TCP pour gérer les connexions des clients au jeu Les Loups"""
     
-    def __init__(self, host='127.0.0.1', port=5001):
+    def __init__(self, host='127.0.0.1', port=5001, config=None, worker_index=None):
         self.host = host
         self.port = port
+        self.config = config or ServerConfig()
+        valid, message = self.config.validate()
+        if not valid:
+            raise ValueError(message)
+        
         self.sock = None
         self.running = False
+        self.event_loop = None  # utilisé uniquement en mode réacteur
         self.clients = {}  # socket -> ClientHandler
+        self.direct_clients = 0  # connexions de vrais clients (hors transferts entre workers)
+        self.game_clients = {}  # id_party -> set de ClientHandler abonnés à la partie
+        self.listeners = {}  # socket d'écoute -> connexions transférées par un autre worker ?
+        self.handoff_listener = None  # socket Unix de transfert vers un nouveau processus
+        self.handed_off = False  # les connexions ont été transférées à un nouveau processus
         self.game_engine = GameEngine.get_instance()
+        
+        # Mode pré-fork : ce serveur est un worker possédant une partie des parties
+        self.router = None
+        if worker_index is not None:
+            self.router = ShardRouter(worker_index, self.config.workers, port, self.config.shard_socket_dir)
+            self.game_engine.configure_shard(worker_index, self.config.workers)
         self.lock = threading.Lock()
+        self.stats = ServerStats()
+        # Échéances des connexions (poignée de main, inactivité, message incomplet)
+        self.timers = TimerWheel(self.config.timer_resolution, self.config.timer_slots)
+        self.rate_limiter = RateLimiter(self.config)
+        self.sessions = SessionRegistry(self.timers, self.config.session_ttl, self.config.session_backlog_size,
+                                        self.stats)
+        self.accept_rate = 0.0  # connexions acceptées par seconde
+        self.accept_rate_since = time.monotonic()
+        self.accept_rate_count = 0
         self.logger = logging.getLogger("TcpServer")
         
         # Enregistrer les callbacks pour les événements du jeu
@@ -40,44 +98,269 @@ class TcpServer:
     def start(self):
         """Démarrer le serveur TCP"""
         try:
-            # Créer le socket serveur
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.sock.bind((self.host, self.port))
-            self.sock.listen(5)
+            restored = []
+            if self.config.takeover:
+                # Reprendre le socket d'écoute et les connexions du processus précédent
+                restored = self._take_over()
+            else:
+                # Créer le socket serveur
+                self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if self.router is not None:
+                    # Tous les workers se partagent le même port, le noyau répartit les connexions
+                    self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                self.sock.bind((self.host, self.port))
+                self.sock.listen(self.config.listen_backlog)
             self.sock.setblocking(False)
+            self.listeners = {self.sock: False}
+            if self.router is not None:
+                self.listeners[self.router.open_listener()] = True
+            if self.config.handoff_socket_path:
+                self.handoff_listener = open_handoff_listener(self.config.handoff_socket_path)
             self.running = True
-            self.logger.info(f"Serveur TCP démarré sur {self.host}:{self.port}")
+            self.logger.info(f"Serveur TCP démarré sur {self.host}:{self.port} (mode {self.config.mode})")
             
-            # Boucle principale pour accepter les connexions
-            while self.running:
-                # Utilisation de select pour attendre des événements sans bloquer
-                readable, _, _ = select.select([self.sock], [], [], 1.0)
-                
-                if self.sock in readable:
-                    client_sock, addr = self.sock.accept()
-                    self.logger.info(f"Nouvelle connexion de {addr}")
-                    
-                    # Créer un gestionnaire pour ce client
-                    client_handler = ClientHandler(client_sock, addr, self)
-                    
-                    # Ajouter le client à la liste des clients
-                    with self.lock:
-                        self.clients[client_sock] = client_handler
-                    
-                    # Démarrer le thread pour gérer ce client
-                    client_thread = threading.Thread(target=client_handler.handle)
-                    client_thread.daemon = True
-                    client_thread.start()
+            if self.config.mode == "reactor":
+                self._serve_reactor(restored)
+            else:
+                self._serve_threaded(restored)
                     
         except Exception as e:
             self.logger.error(f"Erreur serveur TCP: {e}")
         finally:
             self.stop()
     
+    def _serve_threaded(self, restored=()):
+        """Boucle principale du mode un thread par client"""
+        for client_handler in restored:
+            self._start_client_thread(client_handler)
+        
+        while self.running:
+            # Utilisation de select pour attendre des événements sans bloquer
+            watched = list(self.listeners)
+            if self.handoff_listener is not None:
+                watched.append(self.handoff_listener)
+            readable, _, _ = select.select(watched, [], [], self._tick_interval())
+            
+            for listener in readable:
+                if listener is self.handoff_listener:
+                    self._on_handoff_ready()
+                    continue
+                for client_handler in self._accept_pending(listener):
+                    self._start_client_thread(client_handler)
+            
+            if self.running:
+                self._on_tick()
+    
+    def _start_client_thread(self, client_handler):
+        """Démarrer le thread gérant un client (mode un thread par client)"""
+        client_thread = threading.Thread(target=client_handler.handle)
+        client_thread.daemon = True
+        client_handler.thread = client_thread
+        client_thread.start()
+    
+    def _serve_reactor(self, restored=()):
+        """Boucle principale du mode réacteur : un seul thread possède tous les sockets"""
+        self.event_loop = EventLoop()
+        for listener in self.listeners:
+            self.event_loop.register(listener, selectors.EVENT_READ,
+                                     lambda mask, listener=listener: self._on_accept_ready(listener))
+        if self.handoff_listener is not None:
+            self.event_loop.register(self.handoff_listener, selectors.EVENT_READ,
+                                     lambda mask: self._on_handoff_ready())
+        for client_handler in restored:
+            client_handler.attach(self.event_loop)
+        try:
+            self.event_loop.run(timeout=self._tick_interval(), on_tick=self._on_tick)
+        finally:
+            self.event_loop.close()
+    
+    def _on_accept_ready(self, listener):
+        """Accepter les nouvelles connexions dans la boucle d'événements"""
+        for client_handler in self._accept_pending(listener):
+            client_handler.attach(self.event_loop)
+    
+    def _accept_pending(self, listener):
+        """
+        Accepter toutes les connexions en attente sur un socket d'écoute, au plus
+        accept_batch_size par réveil pour ne pas affamer les clients déjà connectés
+        Retourne la liste des gestionnaires des clients acceptés
+        """
+        client_handlers = []
+        accepted = 0
+        while accepted < self.config.accept_batch_size:
+            try:
+                client_sock, addr = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                # Par exemple EMFILE : trop de descripteurs ouverts, réessayer au prochain réveil
+                self.stats.increment("accept_errors")
+                self.logger.error(f"Erreur lors de l'acceptation d'une connexion: {e}")
+                break
+            
+            accepted += 1
+            client_handler = self._add_client(client_sock, addr, self.listeners[listener])
+            if client_handler is not None:
+                client_handlers.append(client_handler)
+        
+        self.stats.increment("connections_accepted", accepted)
+        if accepted == self.config.accept_batch_size:
+            # Des connexions attendent encore : la file d'attente du noyau se remplit
+            self.stats.increment("accept_batches_full")
+        return client_handlers
+    
+    def _add_client(self, client_sock, addr, forwarded, restored_state=None):
+        """
+        Créer le gestionnaire d'un nouveau client et l'enregistrer
+        Retourne None si la connexion est refusée (nombre maximal de connexions atteint)
+        """
+        # Les connexions transférées par les autres workers ne sont pas limitées :
+        # le worker qui a accepté le client a déjà appliqué la limite
+        # (ni celles reprises d'un processus précédent, déjà acceptées)
+        max_connections = self.config.max_connections
+        if not forwarded and restored_state is None and max_connections and self.direct_clients >= max_connections:
+            self.stats.increment("connections_rejected")
+            self.logger.warning(f"Connexion de {addr} refusée: {max_connections} connexions atteintes")
+            self._reject(client_sock)
+            return None
+        
+        self.logger.info(f"Nouvelle connexion de {addr or 'un autre worker'}")
+        
+        # Créer un gestionnaire pour ce client
+        client_handler = ClientHandler(client_sock, addr, self, forwarded=forwarded)
+        
+        # Ajouter le client à la liste des clients
+        with self.lock:
+            self.clients[client_sock] = client_handler
+            if not forwarded:
+                self.direct_clients += 1
+        
+        if restored_state is not None:
+            client_handler.restore_state(restored_state)
+        client_handler.start_timers()
+        return client_handler
+    
+    def _reject(self, client_sock):
+        """Prévenir le client que le serveur est plein puis fermer la connexion"""
+        try:
+            client_sock.setblocking(False)
+            client_sock.send(b'{"status": "KO", "response": {"error": "Serveur complet"}}\n')
+        except OSError:
+            pass
+        try:
+            client_sock.close()
+        except OSError:
+            pass
+    
+    def _take_over(self):
+        """
+        Recevoir le socket d'écoute, les connexions et l'état du serveur qui
+        écoute sur handoff_socket_path (redémarrage sans coupure)
+        Retourne les gestionnaires des clients repris
+        """
+        sockets, state = request_takeover(self.config.handoff_socket_path)
+        self.sock = sockets[0]
+        self.game_engine.import_state(state["engine"])
+        self.sessions.import_state(state["sessions"])
+        
+        client_handlers = [self._add_client(client_sock, client_state["address"], False, client_state)
+                           for client_sock, client_state in zip(sockets[1:], state["clients"])]
+        self.stats.increment("connections_taken_over", len(client_handlers))
+        self.logger.info(f"{len(client_handlers)} connexions reprises du processus précédent")
+        return client_handlers
+    
+    def _on_handoff_ready(self):
+        """Transférer le socket d'écoute et les connexions au processus qui le demande"""
+        try:
+            conn, _ = self.handoff_listener.accept()
+        except BlockingIOError:
+            return
+        
+        with conn:
+            if not read_takeover_request(conn):
+                self.logger.warning("Demande de transfert invalide ignorée")
+                return
+            
+            self.logger.info("Transfert des connexions vers un nouveau processus")
+            
+            # Figer les parties et les clients pour que l'état transmis soit cohérent
+            self.game_engine.shutdown()
+            client_handlers = self._suspend_clients()
+            state = {
+                "engine": self.game_engine.export_state(),
+                "sessions": self.sessions.export_state(),
+                "clients": [client_handler.export_state() for client_handler in client_handlers]
+            }
+            
+            try:
+                send_handoff(conn, [self.sock] + [client_handler.client_socket for client_handler in client_handlers], state)
+            except HandoffError as e:
+                # Le nouveau processus n'a rien repris : continuer à servir
+                self.logger.error(f"Échec du transfert des connexions: {e}")
+                self.game_engine.resume()
+                self._resume_clients(client_handlers)
+                return
+        
+        self.logger.info(f"{len(client_handlers)} connexions transférées, arrêt du serveur")
+        self.handed_off = True
+        self.running = False
+        if self.event_loop is not None:
+            self.event_loop.stop()
+    
+    def _suspend_clients(self):
+        """Arrêter de servir tous les clients sans fermer leurs connexions"""
+        with self.lock:
+            client_handlers = [client_handler for client_handler in self.clients.values() if not client_handler.closed]
+        
+        for client_handler in client_handlers:
+            client_handler.suspend()
+        for client_handler in client_handlers:
+            if client_handler.thread is not None:
+                client_handler.thread.join(timeout=2.0)
+        return client_handlers
+    
+    def _resume_clients(self, client_handlers):
+        """Servir de nouveau les clients après un transfert avorté"""
+        for client_handler in client_handlers:
+            client_handler.suspended = False
+            client_handler.start_timers()
+            if self.event_loop is not None:
+                client_handler.attach(self.event_loop)
+            else:
+                self._start_client_thread(client_handler)
+    
+    def _tick_interval(self):
+        """Attente maximale de la boucle principale entre deux avancées de la roue"""
+        return min(1.0, self.config.timer_resolution)
+    
+    def _on_tick(self):
+        """Traitements périodiques de la boucle principale"""
+        self._expire_timers()
+        self._update_accept_rate()
+    
+    def _update_accept_rate(self):
+        """Recalculer le débit d'acceptation (connexions par seconde) environ chaque seconde"""
+        now = time.monotonic()
+        elapsed = now - self.accept_rate_since
+        if elapsed < 1.0:
+            return
+        
+        accepted = self.stats.get("connections_accepted")
+        self.accept_rate = (accepted - self.accept_rate_count) / elapsed
+        self.accept_rate_since = now
+        self.accept_rate_count = accepted
+    
+    def _expire_timers(self):
+        """Faire avancer la roue et traiter les connexions (et sessions) dont un délai a expiré"""
+        for owner, kind in self.timers.advance():
+            owner.on_timeout(kind)
+    
     def stop(self):
         """Arrêter le serveur TCP"""
         self.running = False
+        if self.event_loop is not None:
+            self.event_loop.stop()
         
         # Fermer tous les sockets clients
         with self.lock:
@@ -87,6 +370,8 @@ class TcpServer:
                 except:
                     pass
             self.clients.clear()
+            self.game_clients.clear()
+            self.direct_clients = 0
         
         # Fermer le socket serveur
         if self.sock:
@@ -94,20 +379,56 @@ class TcpServer:
                 self.sock.close()
             except:
                 pass
+        
+        if self.router is not None:
+            self.router.close()
+        
+        if self.handoff_listener is not None:
+            self.handoff_listener.close()
+            # Après un transfert, le chemin appartient déjà au nouveau processus
+            if not self.handed_off:
+                try:
+                    os.unlink(self.config.handoff_socket_path)
+                except OSError:
+                    pass
                 
         self.logger.info("Serveur TCP arrêté")
     
     def remove_client(self, client_sock):
         """Supprimer un client de la liste des clients"""
         with self.lock:
-            if client_sock in self.clients:
-                del self.clients[client_sock]
+            client_handler = self.clients.pop(client_sock, None)
+            if client_handler is not None:
+                self._unindex_client(client_handler)
+                if not client_handler.forwarded:
+                    self.direct_clients -= 1
+    
+    def bind_client_to_game(self, client_handler, game_id):
+        """Associer un client à une partie et mettre à jour l'index partie -> clients"""
+        with self.lock:
+            if client_handler.game_id == game_id:
+                return
+            self._unindex_client(client_handler)
+            client_handler.game_id = game_id
+            
+            # Un client déjà déconnecté ne doit pas réapparaître dans l'index
+            if client_handler.client_socket in self.clients:
+                self.game_clients.setdefault(game_id, set()).add(client_handler)
+    
+    def _unindex_client(self, client_handler):
+        """Retirer un client de l'index de sa partie (verrou déjà pris)"""
+        subscribers = self.game_clients.get(client_handler.game_id)
+        if subscribers is not None:
+            subscribers.discard(client_handler)
+            if not subscribers:
+                del self.game_clients[client_handler.game_id]
                 
     def on_turn_end(self, game_id, turn_number, move_results):
         """Callback appelé quand un tour se termine"""
         self.logger.info(f"Fin du tour {turn_number} pour la partie {game_id}")
         
         # Notifier tous les clients connectés à cette partie
+        # (avec brouillard de guerre, move_results ne contient pas les positions)
         notification = {
             "notification": "turn_end",
             "id_party": game_id,
@@ -132,12 +453,64 @@ class TcpServer:
     
     def notify_game_clients(self, game_id, notification):
         """Notifier tous les clients connectés à une partie spécifique"""
+        # Seuls les abonnés de la partie sont parcourus, pas toutes les connexions
         with self.lock:
-            for client_handler in self.clients.values():
-                if client_handler.is_in_game(game_id):
-                    client_handler.send_notification(notification)
+            recipients = list(self.game_clients.get(game_id, ()))
+        
+        # Sérialiser une seule fois : tous les destinataires partagent la même trame
+        encoded = EncodedNotification(notification, self.stats)
+        
+        # Les joueurs déconnectés la recevront à la reprise de leur session
+        self.sessions.record(game_id, encoded)
+        
+        if not recipients:
+            return
+        
+        self.stats.increment("notification_deliveries", len(recipients))
+        
+        # Les envois se font hors du verrou : ils ne bloquent pas mais peuvent déconnecter un client
+        for client_handler in recipients:
+            client_handler.send_notification(encoded)
+    
+    def get_stats(self):
+        """Récupérer les compteurs du serveur"""
+        stats = self.stats.snapshot()
+        with self.lock:
+            stats["connected_clients"] = len(self.clients)
+        stats["armed_timers"] = len(self.timers)
+        stats["accept_rate"] = round(self.accept_rate, 1)
+        stats.update(read_listen_overflows())
+        return stats
 
 # Point d'entrée pour démarrer le serveur
 if __name__ == "__main__":
-    server = TcpServer()
+    parser = argparse.ArgumentParser(description="Serveur TCP du jeu Les Loups")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--mode", choices=SERVING_MODES, default="threaded",
+                        help="threaded : un thread par client, reactor : boucle d'événements unique")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="nombre de processus workers (mode pré-fork si > 1)")
+    parser.add_argument("--backpressure", choices=BACKPRESSURE_POLICIES, default="drop",
+                        help="politique appliquée aux notifications d'un client trop lent")
+    parser.add_argument("--backlog", type=int, default=1024,
+                        help="taille de la file d'attente des connexions (listen)")
+    parser.add_argument("--handoff-socket", default=None,
+                        help="socket Unix permettant à un nouveau processus de reprendre les connexions")
+    parser.add_argument("--takeover", action="store_true",
+                        help="démarrer en reprenant les connexions du serveur qui écoute sur --handoff-socket")
+    parser.add_argument("--max-connections", type=int, default=10000,
+                        help="nombre maximal de connexions simultanées (0 : pas de limite)")
+    parser.add_argument("--idle-timeout", type=float, default=300.0,
+                        help="délai d'inactivité (secondes) avant déconnexion (0 : désactivé)")
+    args = parser.parse_args()
+    
+    config = ServerConfig(mode=args.mode, workers=args.workers, backpressure_policy=args.backpressure,
+                          listen_backlog=args.backlog, handoff_socket_path=args.handoff_socket,
+                          takeover=args.takeover, max_connections=args.max_connections, idle_timeout=args.idle_timeout)
+    if config.workers > 1:
+        from .prefork import PreforkServer
+        server = PreforkServer(args.host, args.port, config)
+    else:
+        server = TcpServer(args.host, args.port, config)
     server.start()
\ No newline at end of file
@@ -0,0 +1,89 @@
+import threading
+import time
+import math
+
+class TimerWheel:
+    """
+    Roue de temporisation hachée (hashed timer wheel)
+    Chaque échéance est rangée dans la case correspondant à son tick ; avancer
+    la roue ne parcourt que les cases des ticks écoulés, de sorte que suivre
+    des dizaines de milliers d'échéances reste O(1) par tick et par timer.
+    
+    Repousser une échéance (cas le plus fréquent : un client actif) ne déplace
+    pas le timer : seule l'échéance est mise à jour, et le timer est replacé
+    dans la bonne case quand son ancienne case est atteinte
+    """
+    
+    def __init__(self, resolution=0.5, slots=512, clock=time.monotonic):
+        self.resolution = resolution
+        self.clock = clock
+        self.slots = [set() for _ in range(slots)]
+        self.current_tick = int(clock() / resolution)
+        self.timers = {}  # clé -> [échéance, tick de la case où le timer est rangé]
+        self.lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.timers)
+    
+    def _tick_of(self, deadline):
+        """Premier tick auquel l'échéance est dépassée (jamais dans le passé)"""
+        return max(math.ceil(deadline / self.resolution), self.current_tick + 1)
+    
+    def _place(self, key, entry, deadline):
+        """Ranger un timer dans la case de son échéance"""
+        entry[0] = deadline
+        entry[1] = self._tick_of(deadline)
+        self.slots[entry[1] % len(self.slots)].add(key)
+    
+    def schedule(self, key, delay):
+        """Armer (ou réarmer) le timer d'une clé pour dans delay secondes"""
+        deadline = self.clock() + delay
+        with self.lock:
+            entry = self.timers.get(key)
+            if entry is None:
+                entry = self.timers[key] = [deadline, 0]
+                self._place(key, entry, deadline)
+            elif self._tick_of(deadline) >= entry[1]:
+                # Échéance repoussée : le timer sera replacé quand sa case sera atteinte
+                entry[0] = deadline
+            else:
+                # Échéance avancée : il faut changer de case
+                self.slots[entry[1] % len(self.slots)].discard(key)
+                self._place(key, entry, deadline)
+    
+    def cancel(self, key):
+        """Désarmer le timer d'une clé"""
+        with self.lock:
+            entry = self.timers.pop(key, None)
+            if entry is not None:
+                self.slots[entry[1] % len(self.slots)].discard(key)
+    
+    def advance(self):
+        """
+        Faire avancer la roue jusqu'à l'instant présent
+        Retourne la liste des clés dont le timer a expiré (et est désarmé)
+        """
+        now = self.clock()
+        target = int(now / self.resolution)
+        expired = []
+        
+        with self.lock:
+            # Après une longue pause, un seul tour de roue suffit à tout traiter
+            first = max(self.current_tick + 1, target - len(self.slots) + 1)
+            for tick in range(first, target + 1):
+                self.current_tick = tick
+                slot = self.slots[tick % len(self.slots)]
+                for key in list(slot):
+                    entry = self.timers[key]
+                    if entry[1] > tick:
+                        continue  # timer d'un tour de roue ultérieur
+                    
+                    slot.discard(key)
+                    if entry[0] <= now:
+                        del self.timers[key]
+                        expired.append(key)
+                    else:
+                        self._place(key, entry, entry[0])
+            self.current_tick = max(self.current_tick, target)
+        
+        return expired
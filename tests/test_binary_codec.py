@@ -0,0 +1,87 @@
+import json
+import struct
+
+import pytest
+
+from tcp_server_module.binary_codec import (
+    BinaryProtocolError, LENGTH, OP_GAMEBOARD_STATUS, OP_JSON, OP_LIST, OP_MOVE, OP_NOTIFICATION,
+    OP_PARTY_STATUS, OP_SUBSCRIBE, STATUS_KO, STATUS_OK, decode_request, encode_notification,
+    encode_response_body, frame, request_to_json)
+from tcp_server_module.protocol import ActionResult
+
+
+def ok(response):
+    return ActionResult("OK", response)
+
+
+def test_decode_requests():
+    opcode, request = decode_request(bytes((OP_LIST,)))
+    assert (opcode, request.action, request.params) == (OP_LIST, "list", {})
+    
+    _, request = decode_request(bytes((OP_SUBSCRIBE,)) + struct.pack(">I", 3) + "Zoé".encode("utf-8"))
+    assert (request.action, request.params) == ("subscribe", {"id_party": 3, "player": "Zoé"})
+    
+    _, request = decode_request(bytes((OP_PARTY_STATUS,)) + struct.pack(">II", 3, 7))
+    assert (request.action, request.params) == ("party_status", {"id_party": 3, "id_player": 7})
+    
+    _, request = decode_request(bytes((OP_MOVE,)) + struct.pack(">IIbb", 3, 7, -1, 1))
+    assert (request.action, request.params) == ("move", {"id_party": 3, "id_player": 7, "move": "-1"})
+    
+    message = {"action": "resume", "parameters": [{"resume_token": "3-abc"}]}
+    opcode, request = decode_request(bytes((OP_JSON,)) + json.dumps(message).encode("utf-8"))
+    assert (opcode, request.action, request.params) == (OP_JSON, "resume", {"resume_token": "3-abc"})
+    assert json.loads(request_to_json(request)) == message
+
+
+@pytest.mark.parametrize("body", [
+    b"",
+    bytes((0x42,)),
+    bytes((OP_SUBSCRIBE,)) + b"\x00\x01",
+    bytes((OP_SUBSCRIBE,)) + struct.pack(">I", 3) + b"\xff",
+    bytes((OP_PARTY_STATUS,)) + struct.pack(">I", 3),
+    bytes((OP_MOVE,)) + struct.pack(">IIb", 3, 7, 1),
+    bytes((OP_JSON,)) + b"{not json",
+    bytes((OP_JSON,)) + b'["list"]',
+    bytes((OP_JSON,)) + b'{"parameters": []}',
+])
+def test_malformed_requests_are_refused(body):
+    with pytest.raises(BinaryProtocolError):
+        decode_request(body)
+
+
+def test_encode_responses():
+    body = encode_response_body(OP_LIST, ok({"id_parties": [1, 5]}))
+    assert body == bytes((OP_LIST, STATUS_OK)) + struct.pack(">III", 2, 1, 5)
+    
+    body = encode_response_body(OP_SUBSCRIBE, ok({"id_player": 7, "role": "wolf", "resume_token": "3-abc"}))
+    assert body == bytes((OP_SUBSCRIBE, STATUS_OK)) + struct.pack(">IB", 7, 1) + b"3-abc"
+    body = encode_response_body(OP_SUBSCRIBE, ok({"id_player": 7, "role": "villager"}))
+    assert body == bytes((OP_SUBSCRIBE, STATUS_OK)) + struct.pack(">IB", 7, 0)
+    
+    party = {"id_party": 3, "started": True, "round_in_progress": 4}
+    body = encode_response_body(OP_PARTY_STATUS, ok({"party": party}))
+    assert body == bytes((OP_PARTY_STATUS, STATUS_OK)) + struct.pack(">IBiB", 3, 1, 4, 0)
+    party["move"] = {"next_position": {"row": 2, "col": -1}}
+    body = encode_response_body(OP_PARTY_STATUS, ok({"party": party}))
+    assert body == bytes((OP_PARTY_STATUS, STATUS_OK)) + struct.pack(">IBiBii", 3, 1, 4, 1, 2, -1)
+    
+    body = encode_response_body(OP_GAMEBOARD_STATUS, ok({"visible_cells": "0123"}))
+    assert body == bytes((OP_GAMEBOARD_STATUS, STATUS_OK, 0, 1, 2, 3))
+    
+    body = encode_response_body(OP_MOVE, ok({"round_in_progress": 4, "move": {"next_position": {"row": 1, "col": -1}}}))
+    assert body == bytes((OP_MOVE, STATUS_OK)) + struct.pack(">ibb", 4, 1, -1)
+    
+    result = ok({"session": "resumed"})
+    body = encode_response_body(OP_JSON, result)
+    assert body == bytes((OP_JSON, STATUS_OK)) + result.to_json().encode("utf-8")
+
+
+def test_encode_error_and_notification():
+    body = encode_response_body(OP_MOVE, ActionResult("KO", {"error": "Partie non trouvée"}))
+    assert body == bytes((OP_MOVE, STATUS_KO)) + "Partie non trouvée".encode("utf-8")
+    
+    data = encode_notification({"notification": "game_end", "winner": "wolf"})
+    assert data[:LENGTH.size] == LENGTH.pack(len(data) - LENGTH.size)
+    assert data[LENGTH.size] == OP_NOTIFICATION
+    assert json.loads(data[LENGTH.size + 1:]) == {"notification": "game_end", "winner": "wolf"}
+    assert frame(b"ab") == b"\x00\x00\x00\x02ab"
@@ -0,0 +1,44 @@
+import socket
+from types import SimpleNamespace
+
+from tcp_server_module.client_handler import ClientHandler, TIMER_HANDSHAKE, TIMER_IDLE
+from tcp_server_module.rate_limit import RateLimiter
+from tcp_server_module.server_config import ServerConfig
+from tcp_server_module.sessions import SessionRegistry
+from tcp_server_module.timer_wheel import TimerWheel
+
+
+def make_handler(**config):
+    config = ServerConfig(**config)
+    timers = TimerWheel(config.timer_resolution, config.timer_slots)
+    server = SimpleNamespace(
+        config=config,
+        timers=timers,
+        sessions=SessionRegistry(timers, config.session_ttl, config.session_backlog_size),
+        rate_limiter=RateLimiter(config),
+    )
+    client_socket, peer = socket.socketpair()
+    handler = ClientHandler(client_socket, ("127.0.0.1", 0), server)
+    return handler, timers, (client_socket, peer)
+
+
+def test_idle_timer_is_dropped_once_bound_to_a_game():
+    handler, timers, sockets = make_handler()
+    try:
+        handler.start_timers()
+        assert (handler, TIMER_HANDSHAKE) in timers.timers
+        
+        handler._track_activity(1)
+        assert (handler, TIMER_HANDSHAKE) not in timers.timers
+        assert (handler, TIMER_IDLE) in timers.timers
+        
+        # A subscribed player waits for turn ends without sending anything
+        handler.game_id = 1
+        handler._track_activity(1)
+        assert (handler, TIMER_IDLE) not in timers.timers
+        
+        handler.start_timers()
+        assert len(timers) == 0
+    finally:
+        for sock in sockets:
+            sock.close()
@@ -0,0 +1,51 @@
+import json
+import zlib
+
+from tcp_server_module.compression import (
+    COMPRESSED_FLAG, COMPRESSION_ZDICT, LENGTH, compressed_frame, new_compressor)
+
+THRESHOLD = 64
+
+
+def payloads(first_round):
+    return [json.dumps({"status": "OK", "response": {"visible_cells": "0" * 100, "round": first_round}}).encode(),
+            b'{"status": "OK", "response": {}}',
+            json.dumps({"status": "OK", "response": {"id_parties": list(range(first_round, first_round + 40))}}).encode(),
+            json.dumps({"status": "KO", "response": {"error": "Game not found" * 5}}).encode()]
+
+
+def read_frames(stream, decompressor):
+    """Decode the length-prefixed frames of a stream as a client does"""
+    frames = []
+    offset = 0
+    while offset < len(stream):
+        (length,) = LENGTH.unpack_from(stream, offset)
+        offset += LENGTH.size
+        data = stream[offset:offset + (length & ~COMPRESSED_FLAG)]
+        offset += len(data)
+        frames.append(decompressor.decompress(data) if length & COMPRESSED_FLAG else data)
+    return frames
+
+
+def test_client_decodes_consecutive_frames_with_one_decompressor():
+    compressor = new_compressor()
+    sent = payloads(1) + payloads(2)
+    frames = [compressed_frame(compressor, payload, THRESHOLD) for payload in sent]
+    assert [bool(LENGTH.unpack_from(frame)[0] & COMPRESSED_FLAG) for frame in frames] == [True, False, True, True] * 2
+    stream = b"".join(frames)
+    
+    assert read_frames(stream, zlib.decompressobj(-15, zdict=COMPRESSION_ZDICT)) == sent
+
+
+def test_stream_without_dictionary_continues_the_client_decompressor():
+    decompressor = zlib.decompressobj(-15, zdict=COMPRESSION_ZDICT)
+    before = payloads(1)
+    compressor = new_compressor()
+    stream = b"".join(compressed_frame(compressor, payload, THRESHOLD) for payload in before)
+    assert read_frames(stream, decompressor) == before
+    
+    # After a handoff the new process starts a stream without the dictionary
+    compressor = new_compressor(use_zdict=False)
+    after = payloads(2)
+    stream = b"".join(compressed_frame(compressor, payload, THRESHOLD) for payload in after)
+    assert read_frames(stream, decompressor) == after
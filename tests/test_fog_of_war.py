@@ -0,0 +1,60 @@
+import struct
+
+from game_engine_module.game_state import GameState, Player
+from game_engine_module.move_resolver import MoveResolver
+from tcp_server_module.binary_codec import encode_response_body, OP_GAMEBOARD_STATUS, OP_GAMEBOARD_VIEW
+from tcp_server_module.protocol import ActionResult
+
+
+def make_game(view_radius):
+    game_state = GameState(1, "fog", 6, 6, 30, 10, 0, 4, view_radius)
+    game_state.board.add_player(Player(1, "wolf", "wolf"), 0, 0)
+    game_state.board.add_player(Player(2, "villager", "villager"), 5, 5)
+    return game_state
+
+
+def test_turn_results_hide_positions_with_fog_of_war():
+    game_state = make_game(view_radius=1)
+    resolver = MoveResolver(game_state)
+    resolver.pending_moves = {1: (0, 1), 2: (-1, 0)}
+    
+    results = resolver.resolve_moves()
+    
+    assert results == {1: {"success": True}, 2: {"success": True}}
+
+
+def test_turn_results_keep_positions_without_fog_of_war():
+    game_state = make_game(view_radius=None)
+    resolver = MoveResolver(game_state)
+    resolver.pending_moves = {1: (0, 1)}
+    
+    results = resolver.resolve_moves()
+    
+    assert results == {1: {"success": True, "position": {"row": 0, "col": 1}}}
+
+
+def test_binary_view_carries_the_player_position():
+    response = {
+        "visible_cells": "2?0000",
+        "origin": {"row": 0, "col": 0},
+        "rows": 2,
+        "cols": 3,
+        "position": {"row": 0, "col": 1},
+        "view_radius": 1
+    }
+    
+    body = encode_response_body(OP_GAMEBOARD_STATUS, ActionResult("OK", response))
+    
+    assert body[0] == OP_GAMEBOARD_VIEW
+    assert struct.unpack_from(">HHHHHHB", body, 2) == (0, 0, 2, 3, 0, 1, 1)
+    assert body[2 + 13:] == b"\x02\xff\x00\x00\x00\x00"
+
+
+def test_turn_results_skip_players_unknown_to_the_board():
+    game_state = make_game(view_radius=None)
+    resolver = MoveResolver(game_state)
+    resolver.pending_moves = {9: (0, 1), 2: (-1, 0)}
+    
+    results = resolver.resolve_moves()
+    
+    assert results == {2: {"success": True, "position": {"row": 4, "col": 5}}}
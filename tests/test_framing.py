@@ -0,0 +1,76 @@
+import socket
+
+import pytest
+
+from communication_module.framing import FrameTooLargeError, LineFramer
+
+
+def test_utf8_sequence_split_across_reads_is_decoded_whole():
+    framer = LineFramer(recv_size=16)
+    data = "{\"player\": \"Zoé\"}\n".encode("utf-8")
+    split = data.index("é".encode("utf-8")) + 1  # between the two bytes of 'é'
+    
+    sender, receiver = socket.socketpair()
+    try:
+        sender.sendall(data[:split])
+        framer.recv_from(receiver)
+        assert list(framer.frames()) == []
+        
+        sender.sendall(data[split:])
+        while framer.pending() < len(data):
+            framer.recv_from(receiver)
+        assert [frame.decode("utf-8") for frame in framer.frames()] == ["{\"player\": \"Zoé\"}"]
+    finally:
+        sender.close()
+        receiver.close()
+
+
+def test_reserve_compacts_pending_bytes_then_grows_the_buffer():
+    framer = LineFramer(recv_size=8)
+    framer.feed(b"abc\nde")
+    assert framer.next_frame() == b"abc"
+    assert framer.next_frame() is None
+    assert (framer.start, framer.scan, framer.end) == (4, 6, 6)
+    
+    # Not enough room at the end: "de" moves to the front of the buffer
+    framer.feed(b"fghijk")
+    assert (framer.start, framer.scan, framer.end) == (0, 2, 8)
+    assert len(framer.buffer) == 8
+    
+    # Still no room once compacted: the buffer grows (at least doubling)
+    framer.feed(b"l\n")
+    assert len(framer.buffer) == 16
+    assert framer.next_frame() == b"defghijkl"
+    assert framer.pending() == 0
+
+
+def test_frame_above_the_maximum_size_is_refused():
+    framer = LineFramer(max_frame_size=4)
+    framer.feed(b"abcd\n")
+    assert framer.next_frame() == b"abcd"
+    
+    # Detected without waiting for the end of the line
+    framer.feed(b"abcde")
+    with pytest.raises(FrameTooLargeError) as error:
+        framer.next_frame()
+    assert error.value.max_frame_size == 4
+    
+    framer = LineFramer(max_frame_size=4)
+    framer.use_length_prefix()
+    framer.feed((5).to_bytes(4, "big"))
+    with pytest.raises(FrameTooLargeError):
+        framer.next_frame()
+
+
+def test_switch_to_length_prefix_keeps_the_bytes_already_received():
+    framer = LineFramer()
+    framer.feed(b"{\"action\": \"negotiate\"}\n" + (3).to_bytes(4, "big") + b"\x01\x02\x03" + (2).to_bytes(4, "big"))
+    
+    assert framer.next_frame() == b"{\"action\": \"negotiate\"}"
+    framer.use_length_prefix()
+    assert framer.next_frame() == b"\x01\x02\x03"
+    assert framer.next_frame() is None
+    
+    framer.feed(b"\n\x04")
+    assert framer.next_frame() == b"\n\x04"
+    assert framer.pending() == 0
@@ -0,0 +1,61 @@
+import threading
+
+from game_engine_module.game_engine import GameEngine
+
+
+def start_game(engine, max_time_per_turn):
+    """Partie démarrée avec au moins un loup et un villageois"""
+    id_party = engine.create_game("test", 6, 6, max_time_per_turn, 5, 0, 4)
+    players = []
+    while len(players) < 4:
+        result, error = engine.add_player_to_game(id_party, f"p{len(players)}")
+        assert error is None
+        players.append(result["id_player"])
+    success, error = engine.start_game(id_party)
+    assert success, error
+    return id_party, players
+
+
+def test_turn_ends_early_once_every_living_player_has_moved():
+    engine = GameEngine.get_instance()
+    engine.configure_early_resolution(True, 0.0)
+    id_party, players = start_game(engine, max_time_per_turn=30)
+    
+    ended = threading.Event()
+    engine.register_turn_end_callback(lambda game_id, turn, results: game_id == id_party and ended.set())
+    
+    for id_player in players[:-1]:
+        assert engine.add_move(id_party, id_player, "01")[0]
+    assert not ended.wait(0.3)
+    
+    assert engine.add_move(id_party, players[-1], "01")[0]
+    assert ended.wait(2)
+    assert engine.get_game_details(id_party)["current_turn"] == 2
+
+
+def test_turn_waits_for_deadline_without_early_resolution():
+    engine = GameEngine.get_instance()
+    engine.configure_early_resolution(False)
+    try:
+        id_party, players = start_game(engine, max_time_per_turn=30)
+        
+        ended = threading.Event()
+        engine.register_turn_end_callback(lambda game_id, turn, results: game_id == id_party and ended.set())
+        
+        for id_player in players:
+            assert engine.add_move(id_party, id_player, "01")[0]
+        assert not ended.wait(0.3)
+        assert engine.get_game_details(id_party)["current_turn"] == 1
+    finally:
+        engine.configure_early_resolution(True, 0.0)
+
+
+def test_alive_players_are_counted_on_each_game():
+    engine = GameEngine.get_instance()
+    before = engine.count_alive_players()
+    games = engine.get_game_count()
+    
+    id_party, players = start_game(engine, max_time_per_turn=30)
+    
+    assert engine.get_game_count() == games + 1
+    assert engine.count_alive_players() == before + len(players)
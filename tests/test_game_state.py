@@ -0,0 +1,94 @@
+from game_engine_module.game_state import GameBoard, Player, OBSTACLE
+
+
+def make_board(rows=5, cols=5):
+    return GameBoard(rows, cols, 0)
+
+
+def add(board, id_player, role, row, col):
+    player = Player(id_player, f"p{id_player}", role)
+    board.add_player(player, row, col)
+    return player
+
+
+def test_view_follows_player_moving_between_stacked_cells():
+    board = make_board()
+    add(board, 1, "villager", 2, 2)
+    add(board, 2, "villager", 2, 2)
+    add(board, 3, "villager", 2, 3)
+    assert board.get_view(1, 1)[:2] == (1, 1)
+    
+    # No cell value changes: (2, 2) keeps villager 2, (2, 3) already shows a villager
+    assert board.move_player(1, 0, 1)
+    assert board.get_view(1, 1)[:2] == (1, 2)
+    
+    assert board.move_players({1: (0, -1)}) == {1}
+    assert board.get_view(1, 1)[:2] == (1, 1)
+
+
+def test_stacked_players_keep_their_shared_cell():
+    board = make_board()
+    add(board, 1, "villager", 2, 2)
+    add(board, 2, "villager", 2, 2)
+    
+    assert board.move_player(1, 1, 0)
+    
+    assert board.occupants[2 * 5 + 2] == {2}
+    assert board.occupants[3 * 5 + 2] == {1}
+    assert board.get_visible_cells()[2 * 5 + 2] == "1"
+    assert board.get_visible_cells()[3 * 5 + 2] == "1"
+
+
+def test_wolf_shows_on_a_cell_shared_with_villagers():
+    board = make_board()
+    add(board, 1, "villager", 0, 0)
+    add(board, 2, "wolf", 0, 1)
+    
+    assert board.move_player(2, 0, -1)
+    
+    assert board.occupants[0] == {1, 2}
+    assert board.get_visible_cells()[:2] == "20"
+
+
+def test_eliminations_only_look_at_touched_cells():
+    board = make_board()
+    add(board, 1, "villager", 1, 1)
+    add(board, 2, "wolf", 1, 2)
+    board.resolve_eliminations()
+    
+    board.move_player(2, 0, -1)
+    
+    assert board.touched == {1 * 5 + 1}
+    assert board.resolve_eliminations() == [1]
+    assert board.touched == set()
+    assert board.occupants[1 * 5 + 1] == {2}
+    assert board.count_alive("villager") == 0
+
+
+def test_move_players_applies_valid_moves_in_one_pass():
+    board = make_board()
+    board._set(0 * 5 + 3, OBSTACLE)
+    add(board, 1, "villager", 0, 2)
+    add(board, 2, "wolf", 4, 4)
+    add(board, 3, "villager", 2, 2)
+    add(board, 4, "villager", 3, 3)
+    board.players[4].is_alive = False
+    
+    moved = board.move_players({
+        1: (0, 1),   # obstacle
+        2: (1, 0),   # out of bounds
+        3: (1, 1),   # diagonal
+        4: (0, 1),   # dead
+        5: (0, 1),   # unknown player
+    })
+    assert moved == set()
+    
+    moved = board.move_players({1: (1, 0), 3: (-1, 0), 2: (0, -1)})
+    
+    assert moved == {1, 2, 3}
+    assert board.players[1].position == (1, 2)
+    assert board.players[3].position == (1, 2)
+    assert board.players[2].position == (4, 3)
+    assert board.occupants[1 * 5 + 2] == {1, 3}
+    assert 2 * 5 + 2 not in board.occupants
+    assert board.get_visible_cells() == "".join(map(str, board.grid))
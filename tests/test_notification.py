@@ -0,0 +1,17 @@
+from tcp_server_module.notification import EncodedNotification
+from tcp_server_module.stats import ServerStats
+
+
+def test_each_frame_built_is_counted_once():
+    stats = ServerStats()
+    notification = EncodedNotification({"notification": "turn_end", "id_party": 1}, stats)
+    assert stats.get("notifications_encoded") == 0
+    
+    json_frame = notification.frame_for("json")
+    assert notification.frame_for("json") is json_frame
+    assert stats.get("notifications_encoded") == 1
+    
+    notification.frame_for("json", length_prefixed=True)
+    notification.frame_for("binary")
+    notification.frame_for("binary")
+    assert stats.get("notifications_encoded") == 3
@@ -0,0 +1,78 @@
+from tcp_server_module.outbound import OutboundQueue, QUEUED, DROPPED, COALESCED, OVERFLOW
+
+
+class ThrottledSocket:
+    """Socket that accepts at most `budget` bytes before blocking"""
+    
+    def __init__(self, budget):
+        self.budget = budget
+        self.sent = bytearray()
+    
+    def send(self, data):
+        if not self.budget:
+            raise BlockingIOError()
+        count = min(self.budget, len(data))
+        self.sent += data[:count]
+        self.budget -= count
+        return count
+
+
+def test_drop_policy_drops_notifications_but_keeps_responses():
+    queue = OutboundQueue(high_water_mark=8, policy="drop")
+    assert queue.push(b"12345678", "turn") == QUEUED
+    
+    assert queue.push(b"turn 2", "turn", notification=True) == DROPPED
+    assert queue.push(b"response", notification=False) == QUEUED
+    assert queue.pending_bytes() == b"12345678response"
+
+
+def test_coalesce_policy_replaces_the_pending_notification_of_the_same_key():
+    queue = OutboundQueue(high_water_mark=8, policy="coalesce")
+    assert queue.push(b"turn 1", ("turn", 1), notification=True) == QUEUED
+    assert queue.push(b"end", ("end", 1), notification=True) == DROPPED
+    
+    assert queue.push(b"turn 2!", ("turn", 1), notification=True) == COALESCED
+    assert queue.size == 7
+    assert queue.pending_bytes() == b"turn 2!"
+
+
+def test_disconnect_policy_reports_overflow():
+    queue = OutboundQueue(high_water_mark=8, policy="disconnect")
+    assert queue.push(b"12345678") == QUEUED
+    assert queue.push(b"9", notification=True) == OVERFLOW
+    assert queue.push(b"9") == OVERFLOW
+    assert len(queue) == 1
+
+
+def test_partial_sends_resume_where_the_socket_stopped():
+    queue = OutboundQueue(high_water_mark=64)
+    queue.push(b"hello\n", "a")
+    queue.push(b"world\n", "b")
+    sock = ThrottledSocket(budget=4)
+    
+    assert not queue.flush(sock)
+    assert (queue.offset, queue.size) == (4, 8)
+    assert queue.pending_bytes() == b"o\nworld\n"
+    
+    sock.budget = 5
+    assert not queue.flush(sock)
+    assert len(queue) == 1 and "a" not in queue.by_key
+    
+    sock.budget = 100
+    assert queue.flush(sock)
+    assert bytes(sock.sent) == b"hello\nworld\n"
+    assert (queue.size, queue.offset, queue.by_key) == (0, 0, {})
+
+
+def test_partly_sent_frame_is_never_coalesced():
+    queue = OutboundQueue(high_water_mark=8, policy="coalesce")
+    queue.push(b"turn 1\n", "turn", notification=True)
+    sock = ThrottledSocket(budget=3)
+    assert not queue.flush(sock)
+    
+    queue.push(b"x", notification=False)
+    assert queue.push(b"turn 2\n", "turn", notification=True) == DROPPED
+    
+    sock.budget = 100
+    assert queue.flush(sock)
+    assert bytes(sock.sent) == b"turn 1\nx"
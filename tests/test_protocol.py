@@ -0,0 +1,48 @@
+import json
+
+from tcp_server_module.protocol import Protocol
+
+
+def test_batch_refuses_actions_that_change_the_connection():
+    protocol = Protocol()
+    message = {"action": "batch", "parameters": [{"requests": [
+        {"action": "negotiate", "parameters": [{"encoding": "binary"}]},
+        {"action": "subscribe", "parameters": [{"player": "p1"}, {"id_party": 1}]},
+        {"action": "resume", "parameters": [{"resume_token": "1-abc"}]},
+        {"action": "list"}
+    ]}]}
+    
+    result = protocol.process(json.dumps(message))
+    
+    assert result.status == "OK"
+    assert (result.encoding, result.player_id, result.resume_token, result.compression) == (None, None, None, None)
+    statuses = [response["status"] for response in result.response["responses"]]
+    assert statuses == ["KO", "KO", "KO", "OK"]
+
+
+def request(protocol, action, **params):
+    message = {"action": action, "parameters": [{name: value} for name, value in params.items()]}
+    return protocol.process(json.dumps(message))
+
+
+def test_fog_view_is_only_served_to_the_player_of_the_connection():
+    protocol = Protocol()
+    id_party = protocol.game_engine.create_game("fog", 6, 6, 30, 5, 0, 4, view_radius=1)
+    other = Protocol()
+    other_player = request(other, "subscribe", player="p2", id_party=id_party).response["id_player"]
+    id_player = request(protocol, "subscribe", player="p1", id_party=id_party).response["id_player"]
+    
+    own = request(protocol, "gameboard_status", id_party=id_party, id_player=id_player)
+    assert own.status == "OK"
+    assert "position" in own.response
+    
+    for result in (request(protocol, "gameboard_status", id_party=id_party, id_player=other_player),
+                   request(Protocol(), "gameboard_status", id_party=id_party, id_player=id_player)):
+        assert result.status == "KO"
+        assert "position" not in result.response
+    
+    batch = request(protocol, "batch", requests=[
+        {"action": "gameboard_status", "parameters": [{"id_party": id_party}, {"id_player": id_player}]},
+        {"action": "gameboard_status", "parameters": [{"id_party": id_party}, {"id_player": other_player}]}
+    ])
+    assert [response["status"] for response in batch.response["responses"]] == ["OK", "KO"]
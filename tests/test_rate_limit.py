@@ -0,0 +1,86 @@
+from tcp_server_module.protocol import Request
+from tcp_server_module.rate_limit import DEFAULT_ACTION_COSTS, RateLimiter, TokenBucket
+from tcp_server_module.server_config import ServerConfig
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def board_request(id_party, id_player):
+    return Request("gameboard_status", {"id_party": id_party, "id_player": id_player})
+
+
+def test_other_connections_cannot_drain_a_player_bucket():
+    clock = FakeClock()
+    limiter = RateLimiter(ServerConfig(connection_rate=100, connection_burst=100, player_rate=1, player_burst=4), clock)
+    victim = (1, 1)
+    
+    # Another connection polls the victim's board: only its own connection bucket pays
+    attacker_bucket = limiter.connection_bucket()
+    assert limiter.check(attacker_bucket, board_request(1, 1), player=(1, 2)) == 0.0
+    assert limiter.check(attacker_bucket, board_request(1, 1)) == 0.0
+    assert limiter.player_buckets == {}
+    
+    victim_bucket = limiter.connection_bucket()
+    assert limiter.check(victim_bucket, board_request(1, 1), player=victim) == 0.0
+    assert limiter.player_buckets[victim].tokens == 0.0
+
+
+def test_bucket_refills_at_rate_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=4, clock=clock)
+    bucket.take(4)
+    assert bucket.wait_time(1) == 0.5
+    
+    clock.now = 10.0
+    assert bucket.wait_time(4) == 0.0
+    assert bucket.tokens == 4
+    assert bucket.is_full()
+
+
+def test_cost_above_capacity_is_accepted_when_full_and_leaves_a_debt():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=4, clock=clock)
+    
+    assert bucket.wait_time(10) == 0.0
+    bucket.take(10)
+    assert bucket.tokens == -6
+    
+    # The next request waits for the debt to be repaid
+    assert bucket.wait_time(1) == 7.0
+    clock.now = 7.0
+    assert bucket.wait_time(1) == 0.0
+
+
+def test_check_debits_nothing_when_one_bucket_is_short():
+    clock = FakeClock()
+    limiter = RateLimiter(ServerConfig(connection_rate=10, connection_burst=10, player_rate=1, player_burst=4), clock)
+    player = (1, 1)
+    connection_bucket = limiter.connection_bucket()
+    
+    assert limiter.check(connection_bucket, board_request(1, 1), player) == 0.0
+    assert limiter.check(connection_bucket, board_request(1, 1), player) == 4.0
+    
+    # Refused by the player bucket: the connection bucket was not debited either
+    assert connection_bucket.tokens == 6
+    assert limiter.player_buckets[player].tokens == 0
+
+
+def test_batch_costs_the_sum_of_its_sub_requests():
+    limiter = RateLimiter(ServerConfig())
+    batch = Request("batch", {"requests": [
+        {"action": "move", "parameters": [{"id_party": 1}, {"id_player": 1}, {"move": "01"}]},
+        {"action": "gameboard_status", "parameters": [{"id_party": 1}, {"id_player": 2}]},
+        {"action": "list"},
+        "not a request",
+    ]})
+    
+    total, player_cost = limiter.charges(batch, player=(1, 1))
+    
+    assert total == DEFAULT_ACTION_COSTS["move"] + DEFAULT_ACTION_COSTS["gameboard_status"] + DEFAULT_ACTION_COSTS["list"]
+    assert player_cost == DEFAULT_ACTION_COSTS["move"]
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+from tcp_server_module.notification import EncodedNotification
+from tcp_server_module.sessions import SessionRegistry
+from tcp_server_module.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def make_registry(ttl=60, backlog_size=3):
+    clock = FakeClock()
+    timers = TimerWheel(resolution=0.5, slots=64, clock=clock)
+    return SessionRegistry(timers, ttl, backlog_size), timers, clock
+
+
+def expire_timers(timers):
+    for owner, kind in timers.advance():
+        owner.on_timeout(kind)
+
+
+def connection():
+    return SimpleNamespace(session=None)
+
+
+def turn(number):
+    return EncodedNotification({"action": "turn_end", "turn": number})
+
+
+def test_missed_notifications_are_replayed_in_order_up_to_the_backlog_size():
+    registry, _, _ = make_registry(backlog_size=3)
+    token = registry.create(1, 7)
+    registry.record(2, turn(0))  # another game
+    for number in range(1, 6):
+        registry.record(1, turn(number))
+    
+    session, missed = registry.attach(token, connection())
+    
+    assert (session.id_party, session.id_player) == (1, 7)
+    assert [notification.payload["turn"] for notification in missed] == [3, 4, 5]
+    
+    # Attached players receive notifications directly: nothing is kept any more
+    registry.record(1, turn(6))
+    assert list(session.backlog) == []
+
+
+def test_detached_session_expires_after_its_ttl():
+    registry, timers, clock = make_registry(ttl=60)
+    token = registry.create(1, 7)
+    
+    clock.now = 59.0
+    expire_timers(timers)
+    assert registry.lookup(token) is not None
+    
+    clock.now = 60.0
+    expire_timers(timers)
+    assert registry.lookup(token) is None
+    assert registry.detached == {}
+    assert registry.attach(token, connection()) == (None, [])
+
+
+def test_attached_session_does_not_expire():
+    registry, timers, clock = make_registry(ttl=60)
+    token = registry.create(1, 7)
+    registry.attach(token, connection())
+    
+    clock.now = 120.0
+    expire_timers(timers)
+    assert registry.lookup(token) is not None
+
+
+def test_new_connection_takes_the_session_over():
+    registry, timers, clock = make_registry(ttl=60)
+    token = registry.create(1, 7)
+    first, second = connection(), connection()
+    first.session, _ = registry.attach(token, first)
+    
+    second.session, _ = registry.attach(token, second)
+    assert first.session is None
+    assert second.session.client_handler is second
+    
+    # The old connection closing later must not detach the new one
+    registry.detach(second.session, first)
+    registry.record(1, turn(1))
+    assert list(second.session.backlog) == []
+    
+    clock.now = 120.0
+    expire_timers(timers)
+    assert registry.lookup(token) is second.session
+    
+    registry.detach(second.session, second)
+    assert registry.detached == {1: {second.session}}
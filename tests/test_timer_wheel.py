@@ -0,0 +1,79 @@
+from tcp_server_module.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def make_wheel(slots=8):
+    clock = FakeClock()
+    return TimerWheel(resolution=0.5, slots=slots, clock=clock), clock
+
+
+def test_postponed_timer_is_moved_when_its_old_slot_is_reached():
+    wheel, clock = make_wheel()
+    wheel.schedule("a", 1.0)
+    assert wheel.timers["a"] == [1.0, 2]
+    
+    # Postponing only updates the deadline: the timer stays in the slot of tick 2
+    clock.now = 0.5
+    wheel.schedule("a", 1.0)
+    assert wheel.timers["a"] == [1.5, 2]
+    assert "a" in wheel.slots[2]
+    
+    clock.now = 1.0
+    assert wheel.advance() == []
+    assert wheel.timers["a"] == [1.5, 3]
+    assert "a" in wheel.slots[3] and "a" not in wheel.slots[2]
+    
+    clock.now = 1.5
+    assert wheel.advance() == ["a"]
+    assert len(wheel) == 0
+
+
+def test_deadline_brought_forward_changes_slot():
+    wheel, clock = make_wheel()
+    wheel.schedule("a", 3.0)
+    wheel.schedule("a", 1.0)
+    assert wheel.timers["a"] == [1.0, 2]
+    assert "a" in wheel.slots[2] and "a" not in wheel.slots[6]
+    
+    clock.now = 1.0
+    assert wheel.advance() == ["a"]
+
+
+def test_timer_of_a_later_round_is_skipped():
+    wheel, clock = make_wheel()
+    wheel.schedule("a", 5.0)  # tick 10, in the slot of tick 2
+    
+    clock.now = 1.0
+    assert wheel.advance() == []
+    assert wheel.timers["a"] == [5.0, 10]
+    
+    clock.now = 5.0
+    assert wheel.advance() == ["a"]
+
+
+def test_advance_catches_up_after_a_long_pause():
+    wheel, clock = make_wheel()
+    wheel.schedule("a", 1.0)
+    wheel.schedule("b", 3.0)
+    wheel.schedule("c", 100.0)
+    
+    # Far more ticks than slots have elapsed: one round of the wheel is enough
+    clock.now = 50.0
+    assert sorted(wheel.advance()) == ["a", "b"]
+    assert wheel.current_tick == 100
+    assert wheel.timers["c"] == [100.0, 200]
+    
+    # A timer armed after the pause is never placed in the past
+    wheel.schedule("d", 0.0)
+    assert wheel.timers["d"][1] == 101
+    
+    clock.now = 100.0
+    assert sorted(wheel.advance()) == ["c", "d"]
+    assert len(wheel) == 0